@@ -0,0 +1,83 @@
+"""
+Prompt size and cost of the article pre-compression step: the old fixed cut
+(content[:4000]) versus Collectors/compressor.py's extractive compression.
+
+For each article length it reports the tokens that would be sent, how far
+into the article the prompt text reaches (coverage: share of the article's
+sentences lying at or before the last one included) and the compression
+time per article. Articles are synthetic news-like text with boilerplate
+lines mixed in; pass --files to measure real article texts instead.
+
+    python Benchmarks/bench_compressor.py --sentences 10 40 150 400
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Benchmarks.fakes import article_text
+from Collectors.compressor import TOKEN_BUDGET, compress, split_sentences, strip_boilerplate
+from tokens import estimate_tokens
+
+BOILERPLATE_LINES = ["Advertisement", "Also Read: Markets close higher for third day",
+                     "Follow us on Twitter and Instagram", "Home | India | World", "Subscribe to our newsletter"]
+
+
+def make_article(i, sentences):
+    paragraphs = []
+    for p in range(0, sentences, 4):
+        paragraphs.append(article_text(i * 1000 + p, min(4, sentences - p)))
+        paragraphs.append(BOILERPLATE_LINES[p // 4 % len(BOILERPLATE_LINES)])
+    return "\n\n".join(paragraphs)
+
+
+def coverage(article, sent):
+    """Share of the article's sentences at or before the last article sentence present in `sent`."""
+    sentences = split_sentences(strip_boilerplate(article))
+    last = max((i for i, s in enumerate(sentences) if s in sent), default=-1)
+    return (last + 1) / len(sentences) if sentences else 1.0
+
+
+def bench(label, articles, budget):
+    truncated_tokens, compressed_tokens, truncated_cov, compressed_cov, times = [], [], [], [], []
+    for article in articles:
+        truncated = article[:4000]
+        start = time.perf_counter()
+        compressed = compress(article, budget)
+        times.append(time.perf_counter() - start)
+        truncated_tokens.append(estimate_tokens(truncated))
+        compressed_tokens.append(estimate_tokens(compressed))
+        truncated_cov.append(coverage(article, truncated))
+        compressed_cov.append(coverage(article, compressed))
+    ms = sorted(t * 1000 for t in times)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{label:<14}{statistics.mean(estimate_tokens(a) for a in articles):>9.0f}"
+          f"{statistics.mean(truncated_tokens):>10.0f}{statistics.mean(truncated_cov):>8.0%}"
+          f"{statistics.mean(compressed_tokens):>10.0f}{statistics.mean(compressed_cov):>8.0%}"
+          f"{statistics.median(ms):>9.2f}{p95:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sentences', type=int, nargs='+', default=[10, 40, 150, 400])
+    parser.add_argument('--articles', type=int, default=50, help="articles per length")
+    parser.add_argument('--budget', type=int, default=TOKEN_BUDGET, help="token budget per article")
+    parser.add_argument('--files', nargs='+', help="plain-text articles to measure instead of synthetic ones")
+    args = parser.parse_args()
+
+    print(f"{'':<14}{'article':>9}{'cut at 4000 chars':>18}{'compressed':>18}{'compress ms':>18}")
+    print(f"{'sentences':<14}{'tokens':>9}{'tokens':>10}{'covers':>8}{'tokens':>10}{'covers':>8}{'p50':>9}{'p95':>9}")
+    if args.files:
+        articles = []
+        for path in args.files:
+            with open(path, encoding='utf-8') as f:
+                articles.append(f.read())
+        bench(f"{len(articles)} files", articles, args.budget)
+        return
+    for n in args.sentences:
+        bench(str(n), [make_article(i, n) for i in range(args.articles)], args.budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Micro-benchmark: row-at-a-time inserts (one commit per row) versus the batch
+insert APIs (executemany in one transaction).
+
+    python Benchmarks/bench_db_inserts.py --rows 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Database.tweets_db import DatabaseTweets
+
+
+def make_tweets(n, offset=0):
+    for i in range(offset, offset + n):
+        yield {
+            'id': str(i),
+            'text': f"tweet number {i} " * 8,
+            'author': f"user{i % 97}",
+            'url': f"https://x.com/user/status/{i}",
+            'replyCount': i % 13,
+            'likeCount': i % 1000,
+        }
+
+
+def bench(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseTweets(db_path=os.path.join(tmp, 'single.db'))
+        start = time.perf_counter()
+        for tweet in make_tweets(rows):
+            db.insert_tweet(tweet)
+        single = time.perf_counter() - start
+        db.close_connection()
+
+        db = DatabaseTweets(db_path=os.path.join(tmp, 'batch.db'))
+        start = time.perf_counter()
+        counts = db.insert_tweets(make_tweets(rows))
+        batch = time.perf_counter() - start
+        # Re-inserting the same rows exercises the ignore path
+        again = db.insert_tweets(make_tweets(rows))
+        db.close_connection()
+
+    print(f"rows: {rows}")
+    print(f"insert_tweet  (row at a time): {rows / single:>12,.0f} rows/s")
+    print(f"insert_tweets (batched):       {rows / batch:>12,.0f} rows/s  ({single / batch:.1f}x)")
+    print(f"batch counts: first pass {counts}, second pass {again}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    bench(parser.parse_args().rows)
@@ -0,0 +1,252 @@
+"""
+Offline end-to-end benchmark: runs each pipeline stage against the local
+fakes in Benchmarks/fakes.py (news server, Gemini, Apify, X) with
+configurable latency and error rates, and reports per-stage throughput,
+p50/p95 latency and peak memory as the workload grows. No API keys or
+network access are needed.
+
+Stages and what one "item" / latency sample is:
+  news      feed entries -> articles; latency = feed link resolved .. article stored
+  tweets    scraped tweets; latency = one topic's scraper run (5 topics)
+  generate  sources -> posts; latency = all platform variants for one source
+  publish   queued posts; latency = post claimed .. acknowledged (X quota not binding)
+
+Each (stage, size) runs in a fresh subprocess, in a throwaway working
+directory, so peak RSS and the databases start clean.
+
+    python Benchmarks/bench_pipeline.py --sizes 10 50 200 --latency 0.02 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+STAGES = ("news", "tweets", "generate", "publish")
+
+
+def peak_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+def _offline_env(args):
+    """Keys the stages check for, and a Gemini quota that never binds."""
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ.setdefault("APIFY_API_KEY", "offline-benchmark")
+    os.environ["GEMINI_RPM"] = "1000000"
+    os.environ["LLM_CACHE_DISABLED"] = "1"
+
+
+def _fake_gemini(args):
+    import google.generativeai as genai
+    from Benchmarks.fakes import FakeGeminiModel
+    model = FakeGeminiModel(latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    genai.GenerativeModel = lambda *a, **kw: model
+    return model
+
+
+def bench_news(n, args):
+    import httpx
+    import Collectors.news_collector as news
+    from Benchmarks.fakes import LocalNewsServer
+    from Collectors.feeds import fetch_feeds
+    from Database.feed_registry import FeedRegistry
+    from Database.http_cache import HttpCache
+    from Database.minhash_index import MinHashIndex
+    from Database.news_db import DatabaseNews
+    from Database.redirect_cache import RedirectCache
+    from Database.seen_entries import SeenEntries
+
+    _fake_gemini(args)
+    news.SUMMARY_BATCH_WAIT = 0.05
+    started, latencies = {}, []
+    resolve = news.resolve_without_browser
+
+    async def timed_resolve(client, url):
+        started[url] = time.perf_counter()
+        return await resolve(client, url)
+    news.resolve_without_browser = timed_resolve
+
+    db = DatabaseNews()
+    insert = db.insert_article
+
+    def timed_insert(item):
+        latencies.append(time.perf_counter() - started[item['link']])
+        return insert(item)
+    db.insert_article = timed_insert
+
+    async def run(server):
+        async with httpx.AsyncClient(follow_redirects=True, timeout=10) as client:
+            entries = await fetch_feeds(client, FeedRegistry(db.db_path), urls=[server.feed_url(n)])
+            return await news.run_pipeline(entries, None, client, db, RedirectCache(), SeenEntries(db.db_path),
+                                           MinHashIndex(db.db_path, 'article'), HttpCache())
+
+    with LocalNewsServer(latency=args.latency, error_rate=args.error_rate, seed=args.seed) as server:
+        start = time.perf_counter()
+        inserted = asyncio.run(run(server))
+        elapsed = time.perf_counter() - start
+    return inserted, elapsed, latencies
+
+
+def bench_tweets(n, args):
+    import Collectors.twitter_collector as twitter
+    from Benchmarks.fakes import FakeApifyClientAsync
+    from Database.tweets_db import DatabaseTweets
+
+    topics = 5
+    client = FakeApifyClientAsync(topics=topics, tweets_per_topic=max(1, n // topics),
+                                  latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    latencies = []
+    scrape = twitter._run_topic_scrape
+
+    async def timed_scrape(*a, **kw):
+        start = time.perf_counter()
+        try:
+            return await scrape(*a, **kw)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    twitter._run_topic_scrape = timed_scrape
+
+    db = DatabaseTweets()
+    start = time.perf_counter()
+    asyncio.run(twitter.collect(db, client))
+    elapsed = time.perf_counter() - start
+    stored = db.conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+    return stored, elapsed, latencies
+
+
+def bench_generate(n, args):
+    from Benchmarks.fakes import article_text
+    from Database.news_db import DatabaseNews
+
+    _fake_gemini(args)
+    import Generator.content_generator as generator
+    news_db = DatabaseNews()
+    news_db.insert_articles({'title': f"Story {i}", 'content': article_text(i), 'summary': article_text(i, 3),
+                             'url': f"https://example.com/a/{i}"} for i in range(n))
+    news_db.close_connection()
+
+    latencies = []
+    job = generator._generate_job
+
+    def timed_job(*a):
+        start = time.perf_counter()
+        try:
+            return job(*a)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    generator._generate_job = timed_job
+
+    start = time.perf_counter()
+    generator.main(articles_limit=n, tweets_limit=0)
+    elapsed = time.perf_counter() - start
+    from Database.tweets_db import DatabaseTweets
+    db = DatabaseTweets()
+    posts = db.conn.execute("SELECT COUNT(*) FROM generated_posts").fetchone()[0]
+    return posts, elapsed, latencies
+
+
+def bench_publish(n, args):
+    from Benchmarks.fakes import FakeXClient, VirtualClock
+    from Database.tweets_db import DatabaseTweets
+    from Publisher.scheduler import PublishScheduler
+
+    db = DatabaseTweets()
+    db.insert_generated_posts({'platform': 'Twitter', 'content': f"Benchmark post #{i}",
+                               'source_type': 'benchmark', 'source_url': None} for i in range(n))
+    clock = VirtualClock()
+    client = FakeXClient(limit=max(n * 2, 100), window=900, latency=args.latency,
+                         error_rate=args.error_rate, clock=clock, seed=args.seed)
+    claimed, latencies = {}, []
+    claim, ack = db.claim_post, db.ack_post
+
+    def timed_claim(*a, **kw):
+        post = claim(*a, **kw)
+        if post:
+            claimed[post[0]] = time.perf_counter()
+        return post
+
+    def timed_ack(post_id, *a, **kw):
+        latencies.append(time.perf_counter() - claimed[post_id])
+        return ack(post_id, *a, **kw)
+    db.claim_post, db.ack_post = timed_claim, timed_ack
+
+    scheduler = PublishScheduler(client, db, "benchmark", clock=clock.time, sleep=clock.sleep,
+                                 max_consecutive_failures=50)
+    start = time.perf_counter()
+    stats = scheduler.run(max_posts=n)
+    elapsed = time.perf_counter() - start
+    return stats['published'], elapsed, latencies
+
+
+BENCHES = {"news": bench_news, "tweets": bench_tweets, "generate": bench_generate, "publish": bench_publish}
+
+
+def run_one(stage, n, args):
+    _offline_env(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.mkdir("database")
+        with contextlib.redirect_stdout(io.StringIO()):
+            items, elapsed, latencies = BENCHES[stage](n, args)
+        os.chdir(ROOT)
+    return {
+        'stage': stage, 'n': n, 'items': items, 'seconds': round(elapsed, 3),
+        'items_per_s': round(items / elapsed, 1) if elapsed > 0 else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        'peak_rss_mb': round(peak_rss_kb() / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds per fake service call")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of fake calls that fail")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help="print one JSON result per line (for baselines)")
+    parser.add_argument('--child', nargs=2, metavar=('STAGE', 'N'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], int(args.child[1]), args)))
+        return
+
+    if not args.json:
+        print(f"{'stage':<10}{'n':>6}{'items':>7}{'seconds':>9}{'items/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'peak RSS MB':>13}")
+    for stage in args.stages:
+        for n in args.sizes:
+            cmd = [sys.executable, __file__, '--child', stage, str(n), '--latency', str(args.latency),
+                   '--error-rate', str(args.error_rate), '--seed', str(args.seed)]
+            out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            if args.json:
+                print(json.dumps(r))
+                continue
+            fmt = lambda v: "-" if v is None else v
+            print(f"{stage:<10}{n:>6}{r['items']:>7}{r['seconds']:>9}{fmt(r['items_per_s']):>9}"
+                  f"{fmt(r['p50_ms']):>9}{fmt(r['p95_ms']):>9}{r['peak_rss_mb']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Peak memory of the Twitter collector's store path: materializing every raw
+scraper item in a list (the old behaviour) versus streaming them through the
+filter -> projection -> batched-insert generators with store_tweets_async,
+the path collect() uses.
+
+Each measurement runs in a fresh subprocess so ru_maxrss is not polluted by
+earlier runs. Reports peak RSS and tracemalloc peak per 1k tweets.
+
+    python Benchmarks/bench_tweet_stream.py --sizes 1000 10000 50000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def fake_items(n):
+    """Scraper-shaped items: the real ones carry a large nested author/entities payload."""
+    for i in range(n):
+        yield {
+            'id': str(10**18 + i),
+            'url': f"https://x.com/user{i % 500}/status/{10**18 + i}",
+            'fullText': f"Tweet {i} about a trending topic " * 6,
+            'viewCount': 5000 + (i * 7919) % 50000,
+            'likeCount': i % 900,
+            'replyCount': i % 40,
+            'author': {'userName': f"user{i % 500}", 'description': "bio " * 40,
+                       'entities': {'urls': [{'expanded_url': f"https://example.com/{j}"} for j in range(10)]}},
+            'entities': {'hashtags': [{'text': f"tag{j}"} for j in range(8)]},
+        }
+
+
+async def topic_items(items):
+    """The (topic, item) stream fetch_twitter_trends yields."""
+    for item in items:
+        yield "#Topic", item
+
+
+def peak_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run_one(mode, n):
+    from Collectors.twitter_collector import store_tweets_async, project_tweet
+    from Database.tweets_db import DatabaseTweets
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseTweets(db_path=os.path.join(tmp, 'tweets.db'))
+        baseline = peak_rss_kb()
+        tracemalloc.start()
+        if mode == "list":
+            raw = list(fake_items(n))
+            kept = [t for t in raw if t.get('viewCount', 0) >= 10000]
+            counts = db.insert_tweets([project_tweet(t) for t in kept])
+        else:
+            counts = asyncio.run(store_tweets_async(db, topic_items(fake_items(n)), minimum_views=10000))
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        db.close_connection()
+    return {'mode': mode, 'tweets': n, 'inserted': counts['inserted'],
+            'rss_growth_kb': peak_rss_kb() - baseline, 'traced_peak_kb': traced_peak // 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'N'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], int(args.child[1]))))
+        return
+
+    print(f"{'mode':<8}{'tweets':>8}{'RSS growth KB':>15}{'KB/1k':>8}{'traced KB':>11}{'KB/1k':>8}")
+    for n in args.sizes:
+        for mode in ("list", "stream"):
+            out = subprocess.run([sys.executable, __file__, '--child', mode, str(n)],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out)
+            per_k = 1000 / n
+            print(f"{mode:<8}{n:>8}{r['rss_growth_kb']:>15}{r['rss_growth_kb'] * per_k:>8.0f}"
+                  f"{r['traced_peak_kb']:>11}{r['traced_peak_kb'] * per_k:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
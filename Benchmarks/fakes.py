@@ -0,0 +1,178 @@
+"""
+Local stand-ins for every service the pipeline talks to, so each stage can be
+benchmarked offline:
+
+- LocalNewsServer: an HTTP server on 127.0.0.1 serving an RSS feed, redirect
+  links (standing in for Google News links) and article pages with ETags.
+- FakeGeminiModel: answers summary, batch-summary and multi-platform post
+  prompts in the shape the real model is asked for.
+- FakeApifyClientAsync: re-exported from Collectors/fake_apify.py.
+- FakeXClient / VirtualClock: re-exported from Publisher/fake_client.py.
+
+Every fake takes a latency (seconds per call) and an error rate, and is
+seeded so runs are repeatable.
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from Publisher.fake_client import FakeXClient, VirtualClock
+from Collectors.fake_apify import FakeApifyClientAsync
+
+SUBJECTS = ["The minister", "The company", "The court", "The committee", "The city council", "The central bank",
+            "The opposition leader", "The police", "The university", "The health department", "The union",
+            "The airline", "The state government", "The football club", "The research team", "The regulator"]
+VERBS = ["announced", "rejected", "approved", "questioned", "welcomed", "delayed", "reviewed", "criticised",
+         "defended", "expanded", "postponed", "confirmed", "proposed", "investigated", "funded", "suspended"]
+OBJECTS = ["a new policy for farmers", "the budget for the coming year", "plans for a metro line",
+           "a report on air quality", "the merger with its rival", "new rules for online payments",
+           "a scheme to train teachers", "the fuel price increase", "a ban on plastic bags",
+           "the results of the election", "a proposal to build more hospitals", "the export agreement",
+           "changes to the tax system", "a plan to clean the river", "the hiring of new staff",
+           "the launch of a satellite"]
+CLAUSES = ["after a long meeting on", "despite protests on", "in a statement issued on", "following reports on",
+           "during a press conference on", "ahead of a vote on", "in a letter sent on", "at an event held on"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def article_text(i, sentences=25):
+    """Deterministic, article-like English text that newspaper's extractor accepts."""
+    rnd = random.Random(i)
+    return " ".join(
+        f"{rnd.choice(SUBJECTS)} {rnd.choice(VERBS)} {rnd.choice(OBJECTS)} {rnd.choice(CLAUSES)} "
+        f"{rnd.choice(DAYS)}, and officials said {rnd.randint(2, 990)} people in district {rnd.randint(1, 9999)} "
+        f"would be affected by the decision."
+        for _ in range(sentences)
+    )
+
+
+class _Faults:
+    """Shared latency / error injection, safe to use from several threads."""
+
+    def __init__(self, latency, error_rate, seed):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def fail(self):
+        """Counts a call and returns True if it should fail."""
+        with self._lock:
+            self.calls += 1
+            failed = self.random.random() < self.error_rate
+            self.errors += failed
+            return failed
+
+
+# --- News sites ---
+class _NewsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        faults = self.server.faults
+        time.sleep(faults.latency)
+        if faults.fail():
+            return self._send(503, b"Service Unavailable")
+
+        path, _, query = self.path.partition("?")
+        base = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+        if path == "/rss":
+            n = int(dict(p.split("=") for p in query.split("&") if "=" in p).get("n", 20))
+            etag = f'"rss-{n}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            items = "".join(
+                f"<item><title>Story {i}: {SUBJECTS[i % len(SUBJECTS)]} {VERBS[i % len(VERBS)]} news</title>"
+                f"<link>{base}/r/{i}</link><guid>bench-{i}</guid></item>"
+                for i in range(n)
+            )
+            body = f"<?xml version='1.0'?><rss version='2.0'><channel><title>Bench</title>{items}</channel></rss>"
+            return self._send(200, body.encode(), {"Content-Type": "application/rss+xml", "ETag": etag})
+        if path.startswith("/r/"):
+            # Stands in for a Google News link: a redirect to the publisher page
+            return self._send(302, headers={"Location": f"{base}/a/{path[3:]}"})
+        if path.startswith("/a/"):
+            i = int(path[3:])
+            etag = f'"a-{i}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            paragraphs = "".join(f"<p>{sentence}.</p>" for sentence in article_text(i).split(". "))
+            body = (f"<html><head><title>Story {i}</title></head><body><nav>Home | World | Sport</nav>"
+                    f"<article><h1>Story {i}</h1>{paragraphs}</article><footer>Copyright</footer></body></html>")
+            return self._send(200, body.encode(), {"Content-Type": "text/html; charset=utf-8", "ETag": etag})
+        return self._send(404, b"Not Found")
+
+
+class LocalNewsServer:
+    """Serves /rss?n=N, /r/<i> (302 to the article) and /a/<i> (article HTML) on a free local port."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _NewsHandler)
+        self.server.daemon_threads = True
+        self.server.faults = _Faults(latency, error_rate, seed)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def feed_url(self, n):
+        return f"{self.url}/rss?n={n}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# --- Gemini ---
+class FakeGeminiModel:
+    """
+    Drop-in for genai.GenerativeModel. JSON requests are answered with one
+    entry per ARTICLE ID (batch summaries) or per platform (post variants);
+    anything else gets a short plain-text post.
+    """
+
+    def __init__(self, model_name="fake-gemini", latency=0.0, error_rate=0.0, seed=0):
+        self.model_name = model_name
+        self.faults = _Faults(latency, error_rate, seed)
+
+    def generate_content(self, prompt, generation_config=None):
+        time.sleep(self.faults.latency)
+        if self.faults.fail():
+            raise RuntimeError("503 The model is overloaded (fake)")
+        digest = zlib.crc32(prompt.encode()) % 10000
+        if generation_config and generation_config.get("response_mime_type") == "application/json":
+            article_ids = re.findall(r'ARTICLE ID: "([^"]+)"', prompt)
+            if article_ids:
+                body = {key: f"* Point one about story {key}.\n* Point two.\n* Point three." for key in article_ids}
+            else:
+                platforms = re.findall(r'- "(\w+)":', prompt)
+                body = {p: f"Take #{digest} on today's story for {p}. #News #India" for p in platforms}
+            return SimpleNamespace(text=json.dumps(body))
+        return SimpleNamespace(text=f"Take #{digest} on today's story. #News #India")
+
+
+__all__ = ["LocalNewsServer", "FakeGeminiModel", "FakeApifyClientAsync", "FakeXClient", "VirtualClock",
+           "article_text"]
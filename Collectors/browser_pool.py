@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+# Resource types a redirect resolution actually needs. The Google News interstitial
+# redirects from script, so scripts and XHR stay; images, fonts, media and styles
+# are aborted before they hit the network.
+ALLOWED_RESOURCE_TYPES = {"document", "script", "xhr", "fetch"}
+
+
+async def _block_subresources(route):
+    if route.request.resource_type in ALLOWED_RESOURCE_TYPES:
+        await route.continue_()
+    else:
+        await route.abort()
+
+
+class BrowserPool:
+    """
+    Hands out Playwright pages from a fixed set of browser contexts on one
+    browser. The browser is launched (by awaiting `launch`) and the contexts
+    opened on the first page() call, so a run that never needs a browser never
+    starts one. If the launch fails, every later page() call fails at once
+    instead of launching again. Pages are recycled between resolutions, and a
+    page that crashed or was closed is replaced with a fresh context before
+    reuse.
+    """
+
+    def __init__(self, launch, size=4, block_resources=True):
+        self.launch = launch
+        self.browser = None
+        self.size = size
+        self.block_resources = block_resources
+        self._idle = asyncio.Queue()
+        self._contexts = {}
+        self._crashed = set()
+        self._start_lock = asyncio.Lock()
+        self._launch_error = None
+        self.restarts = 0
+        self.resolved = 0
+        self.busy_seconds = 0.0
+
+    async def start(self):
+        """Launches the browser and opens `size` contexts, each with one page. Does nothing if started."""
+        async with self._start_lock:
+            if self._launch_error is not None:
+                raise RuntimeError(f"Browser launch failed earlier in this run: {self._launch_error}")
+            if self.browser is None:
+                try:
+                    self.browser = await self.launch()
+                except Exception as e:
+                    self._launch_error = e
+                    raise
+                for _ in range(self.size):
+                    await self._idle.put(await self._new_page())
+        return self
+
+    async def _new_page(self):
+        context = await self.browser.new_context()
+        if self.block_resources:
+            await context.route("**/*", _block_subresources)
+        page = await context.new_page()
+        page.on("crash", lambda crashed: self._crashed.add(crashed))
+        self._contexts[page] = context
+        return page
+
+    async def _restart(self, page):
+        """Closes a broken page's context and returns a replacement page."""
+        self._crashed.discard(page)
+        context = self._contexts.pop(page, None)
+        if context:
+            try:
+                await context.close()
+            except Exception as e:
+                logging.error(f"Error closing browser context: {e}")
+        self.restarts += 1
+        return await self._new_page()
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrows an idle page; it is returned to the pool (or replaced) on exit."""
+        if self.browser is None:
+            await self.start()
+        page = await self._idle.get()
+        if page.is_closed() or page in self._crashed:
+            logging.warning("Browser page crashed or closed, restarting it.")
+            page = await self._restart(page)
+        start = time.perf_counter()
+        try:
+            yield page
+        except Exception:
+            page = await self._restart(page)
+            raise
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+            self.resolved += 1
+            await self._idle.put(page)
+
+    def urls_per_second(self):
+        """
+        Resolutions per second of page time, i.e. what one busy page sustains.
+        Idle time is left out, so `size` pages handle `size` times this.
+        """
+        return self.resolved / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'launched': self.browser is not None,
+            'resolved': self.resolved,
+            'restarts': self.restarts,
+            'urls_per_second': round(self.urls_per_second(), 2),
+            'avg_seconds_per_url': round(self.busy_seconds / self.resolved, 2) if self.resolved else 0.0,
+        }
+
+    async def close(self):
+        """Closes the contexts and the browser, if it was launched."""
+        while not self._idle.empty():
+            page = self._idle.get_nowait()
+            context = self._contexts.pop(page, None)
+            if context:
+                await context.close()
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
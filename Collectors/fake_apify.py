@@ -0,0 +1,98 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+WORDS = ["farmers", "year", "line", "quality", "rival", "payments", "teachers", "increase", "bags", "election",
+         "hospitals", "agreement", "system", "river", "staff", "satellite"]
+
+
+class _FakeDataset:
+    def __init__(self, items):
+        self.items = items
+
+    async def iterate_items(self):
+        for item in self.items:
+            yield item
+
+
+class _FakeActor:
+    def __init__(self, client):
+        self.client = client
+
+    async def call(self, run_input=None):
+        client = self.client
+        run_input = run_input or {}
+        topic = run_input.get("searchTerms", [None])[0]
+        client.in_flight += 1
+        client.max_in_flight = max(client.max_in_flight, client.in_flight)
+        try:
+            await asyncio.sleep(client.topic_latency.get(topic, client.latency))
+            if topic in client.failing_topics or client.random.random() < client.error_rate:
+                raise RuntimeError("Actor run failed (fake)")
+        finally:
+            client.in_flight -= 1
+        client.runs.append(run_input)
+        if topic is not None:
+            limit = client.tweets_per_topic
+            if client.respect_max_items:
+                limit = min(limit, run_input.get("maxItems", limit))
+            items = client.tweets_for(topic, limit)
+        else:
+            items = [{"topic": f"#Topic{k}", "tweet_volume": f"{100 - k}.5k"} for k in range(client.topics)]
+        dataset_id = f"dataset-{len(client.datasets)}"
+        client.datasets[dataset_id] = items
+        return {"defaultDatasetId": dataset_id}
+
+
+class FakeApifyClientAsync:
+    """
+    Local stand-in for ApifyClientAsync with the trends and tweet-scraper
+    actors. The trends actor returns `topics` topics; the tweet scraper
+    returns `tweets_per_topic` scraper-shaped items per topic (regardless of
+    maxItems, so runs can be scaled up, unless `respect_max_items` is set),
+    most above the collector's view threshold. Runs take `latency` seconds
+    (or `topic_latency[topic]`), fail at `error_rate` or always for
+    `failing_topics`, and every finished run's input is kept in `runs`.
+    `max_in_flight` records the most actor runs that were active at once.
+    """
+
+    def __init__(self, topics=5, tweets_per_topic=100, latency=0.0, error_rate=0.0, seed=0,
+                 respect_max_items=False, topic_latency=None, failing_topics=()):
+        self.topics = topics
+        self.tweets_per_topic = tweets_per_topic
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.respect_max_items = respect_max_items
+        self.topic_latency = topic_latency or {}
+        self.failing_topics = set(failing_topics)
+        self.runs = []
+        self.datasets = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._next_id = 10**18
+
+    def actor(self, actor_id):
+        return _FakeActor(self)
+
+    def dataset(self, dataset_id):
+        return _FakeDataset(self.datasets.get(dataset_id, []))
+
+    def tweets_for(self, topic, limit=None):
+        rnd = random.Random(f"{topic}-{self._next_id}")
+        now = datetime.now(timezone.utc)
+        items = []
+        for k in range(self.tweets_per_topic if limit is None else limit):
+            self._next_id += 1
+            words = " ".join(rnd.choice(WORDS) + str(rnd.randint(0, 99999)) for _ in range(12))
+            items.append({
+                "id": str(self._next_id),
+                "url": f"https://x.com/user{k % 300}/status/{self._next_id}",
+                "fullText": f"{topic} {words}",
+                "viewCount": rnd.choice([2_000, 15_000, 40_000, 120_000, 900_000]),
+                "likeCount": rnd.randint(0, 5000),
+                "replyCount": rnd.randint(0, 400),
+                "createdAt": (now - timedelta(seconds=k)).strftime("%a %b %d %H:%M:%S +0000 %Y"),
+                "author": {"userName": f"user{k % 300}", "description": "bio " * 20},
+            })
+        return items
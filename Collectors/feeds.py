@@ -0,0 +1,94 @@
+import os
+import asyncio
+import logging
+import feedparser
+from itertools import zip_longest
+from Database.seen_entries import canonicalize_url
+
+DEFAULT_FEEDS = ["https://news.google.com/rss?hl=en-IN&gl=IN&ceid=IN:en"]
+# Feeds downloaded at the same time
+FEED_CONCURRENCY = 8
+
+
+def configured_feeds():
+    """The default feed plus any extra feeds listed (comma separated) in NEWS_FEEDS."""
+    extra = [url.strip() for url in os.getenv("NEWS_FEEDS", "").split(",") if url.strip()]
+    return list(dict.fromkeys(DEFAULT_FEEDS + extra))
+
+
+def _entry_record(entry):
+    """The fields of a feed entry the pipeline uses, in a form that can be stored as JSON."""
+    return {
+        'id': entry.get('id'),
+        'title': entry.get('title', ''),
+        'link': entry.get('link'),
+        'published': entry.get('published'),
+    }
+
+
+async def fetch_feed(client, registry, url, semaphore):
+    """
+    Fetches one registered feed with a conditional GET. Returns its entries:
+    freshly parsed on a 200, the stored ones on a 304, none on failure.
+    """
+    feed = registry.get(url) or {'etag': None, 'last_modified': None, 'entries': []}
+    headers = {}
+    if feed['etag']:
+        headers['If-None-Match'] = feed['etag']
+    if feed['last_modified']:
+        headers['If-Modified-Since'] = feed['last_modified']
+    async with semaphore:
+        try:
+            response = await client.get(url, headers=headers)
+        except Exception as e:
+            logging.error(f"Error fetching feed {url}: {e}")
+            return url, None, feed['entries']
+
+    if response.status_code == 304:
+        registry.update(url, 304)
+        return url, 304, feed['entries']
+    if response.status_code != 200:
+        print(f"Feed {url} returned HTTP {response.status_code}, skipping.")
+        registry.update(url, response.status_code)
+        return url, response.status_code, []
+
+    parsed = await asyncio.to_thread(feedparser.parse, response.content)
+    entries = [_entry_record(entry) for entry in parsed.entries if entry.get('link')]
+    registry.update(url, 200, response.headers.get('etag'), response.headers.get('last-modified'), entries)
+    return url, 200, entries
+
+
+def merge_entries(feed_entries):
+    """
+    Interleaves the entries of several feeds (first of each feed, then the
+    second of each...) so a processing limit samples every feed, dropping
+    entries already taken from another feed by guid, link or title.
+    """
+    merged, keys = [], set()
+    for round_ in zip_longest(*feed_entries):
+        for entry in round_:
+            if entry is None:
+                continue
+            entry_keys = {('guid', entry.get('id')), ('link', canonicalize_url(entry.get('link'))),
+                          ('title', (entry.get('title') or '').strip().lower())}
+            entry_keys = {key for key in entry_keys if key[1]}
+            if entry_keys & keys:
+                continue
+            keys |= entry_keys
+            merged.append(feedparser.FeedParserDict(entry))
+    return merged
+
+
+async def fetch_feeds(client, registry, urls=None):
+    """
+    Registers and concurrently fetches every feed, then merges their entries
+    into one deduplicated work list.
+    """
+    urls = urls or configured_feeds()
+    registry.register(urls)
+    semaphore = asyncio.Semaphore(FEED_CONCURRENCY)
+    results = await asyncio.gather(*(fetch_feed(client, registry, url, semaphore) for url in urls))
+    statuses = [status for _, status, _ in results]
+    print(f"Fetched {len(urls)} feeds: {statuses.count(200)} changed, {statuses.count(304)} unchanged (304), "
+          f"{len(urls) - statuses.count(200) - statuses.count(304)} failed.")
+    return merge_entries([entries for _, _, entries in results])
@@ -1,136 +1,436 @@
 import os
 import time
+import json
+import asyncio
+import statistics
 import requests
-import feedparser
+import httpx
 import google.generativeai as genai
 from newspaper import Article, Config, ArticleException
-from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not __package__:  # run as a script rather than through `python -m Pipeline`
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from Database.news_db import DatabaseNews
+from Database.redirect_cache import RedirectCache
+from Database.http_cache import HttpCache
+from Database.seen_entries import SeenEntries
+from Database.llm_cache import get_llm_cache
+from Database.minhash_index import MinHashIndex, estimate_similarity
+from Database.feed_registry import FeedRegistry
+from Collectors.browser_pool import BrowserPool
+from Collectors.feeds import fetch_feeds
+from Collectors.compressor import compress
+from Pipeline.config import configure_gemini
+from metrics import METRICS, timed, count, export_run
+from Collectors.gnews_decoder import resolve_without_browser, is_google_news_url
 
 # --- 1. SETUP ---
-# Load environment variables and configure APIs as before
-load_dotenv()
-try:
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY not found. Please set it in your .env file.")
-    genai.configure(api_key=GEMINI_API_KEY)
-except Exception as e:
-    print(f"Error configuring Gemini API: {e}")
-    exit()
-
+# Gemini is configured by main() (see Pipeline/config.py), not at import time.
 # Configure newspaper3k with a browser user-agent
 config = Config()
 config.browser_user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'
 config.request_timeout = 20
 
-# --- NEW FUNCTION: Using Playwright to resolve the redirect ---
-def resolve_final_url(page, gnews_url):
-    """Uses an existing Playwright page to resolve a redirect URL."""
+# Per-stage concurrency limits for the pipeline in main(). Each stage pulls from a
+# bounded queue, so a slow stage applies back-pressure instead of buffering the feed.
+STAGE_CONCURRENCY = {
+    'resolve': 8,
+    'download': 8,
+    'summarize': 4,
+    'persist': 1,  # single writer, SQLite connections are not shared across tasks
+}
+QUEUE_SIZE = 16
+# Articles are summarized several per Gemini request. A batch is sent when it is
+# full or when no new article arrived for SUMMARY_BATCH_WAIT seconds.
+SUMMARY_BATCH_SIZE = 5
+SUMMARY_BATCH_WAIT = 2.0
+# Article text is pre-compressed to this many tokens (its best sentences, see
+# Collectors/compressor.py) before it goes into a summarization prompt
+ARTICLE_TOKEN_BUDGET = 600
+# Estimated Jaccard similarity (word 3-shingles) above which two articles are treated
+# as copies of the same wire story and only the first one is summarized
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Only links the HTTP fast path cannot decode reach the browser. Each pooled page is
+# its own browser context, so size this against the runner's memory.
+BROWSER_POOL_SIZE = 2
+
+# --- Browser fallback for links the HTTP resolver could not decode ---
+@timed("playwright.resolve_final_url")
+async def resolve_final_url(page, gnews_url):
+    """
+    Uses an existing Playwright page to resolve a redirect URL. Returns
+    (final_url, html): the publisher page is already loaded at that point,
+    so its DOM is handed on for extraction instead of being downloaded again.
+    """
     try:
-        page.goto(gnews_url, timeout=20000, wait_until='domcontentloaded')
-        page.wait_for_timeout(2000) # Wait for JS redirects
+        await page.goto(gnews_url, timeout=20000, wait_until='commit')
+        # Wait for the JS redirect to leave Google News instead of sleeping a fixed time
+        await page.wait_for_url(lambda url: not is_google_news_url(url), timeout=10000, wait_until='commit')
         final_url = page.url
         if "news.google.com" in final_url:
-            return None
-        return final_url
+            return None, None
     except PlaywrightTimeoutError:
         print(f"Timeout resolving URL: {gnews_url}")
-        return None
+        return None, None
     except Exception as e:
         print(f"Error resolving URL {gnews_url}: {e}")
-        return None
+        return None, None
+    try:
+        await page.wait_for_load_state('domcontentloaded', timeout=10000)
+        html = await page.content()
+    except Exception:
+        html = None  # resolved but not rendered; the download stage fetches it over HTTP
+    return final_url, html
 
 
-# The rest of the functions remain the same
-def get_article_content_from_url(url):
-    """Downloads and parses a news article to extract its main text content."""
+@timed("newspaper.extract")
+def get_article_content_from_url(url, html=None):
+    """
+    Parses a news article to extract its main text content. Pass `html` when
+    the page has already been fetched; otherwise newspaper downloads it.
+    """
     try:
         article = Article(url, config=config)
-        article.download()
+        article.download(input_html=html)
         article.parse()
         return article.text
     except (ArticleException, IOError) as e:
         print(f"Failed to get content from {url}: {e}")
         return None
 
+@timed("news.summarize_with_gemini")
 def summarize_with_gemini(content, title):
     """Uses the Gemini LLM to summarize a single article."""
     if not content or len(content.strip()) < 150:
         return None
+    content = compress(content, ARTICLE_TOKEN_BUDGET)
+    if not content.strip():
+        return None
 
     model = genai.GenerativeModel('gemini-1.5-flash-latest')
     prompt = f"""
     You are an expert news analyst. Summarize the following news article in 3-4 clear and concise bullet points.
     Focus on the key takeaways and essential information.
     ARTICLE TITLE: "{title}"
-    ARTICLE CONTENT: "{content[:4000]}"
+    ARTICLE CONTENT: "{content}"
     """
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return get_llm_cache().generate(model, prompt)
     except Exception as e:
         return None
 
-def main():
-    news_feed = feedparser.parse("https://news.google.com/rss?hl=en-IN&gl=IN&ceid=IN:en")
-    articles_to_process = 15
-    db = DatabaseNews()
-
-    # for entry in news_feed.entries[:articles_to_process]:
-    #     title = entry.title
-    #     google_news_link = entry.link
-    #     final_url = resolve_final_url_with_playwright(google_news_link)
-
-    #     if not final_url or "news.google.com" in final_url:
-    #         continue
-        
-    #     article_content = get_article_content_from_url(final_url)
-
-    #     if article_content:
-    #         summary = summarize_with_gemini(article_content, title)
-    #         article = {
-    #             'title': title,
-    #             'content': article_content,
-    #             'summary': summary,
-    #             'url': final_url
-    #         }
-    #         article_id = db.insert_article(article)
-    #         print(f"Inserted article with ID {article_id} into the database.")
-
-    #     else:
-    #         continue
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-
-        print(f"Processing up to {articles_to_process} articles...")
-
-        for entry in news_feed.entries[:articles_to_process]:
-            title = entry.title
-            google_news_link = entry.link
-            final_url = resolve_final_url(page,google_news_link)
-            if not final_url or "news.google.com" in final_url:
+def _parse_batch_summaries(text, keys):
+    """Validates a batch response: a JSON object mapping article keys to non-empty summaries."""
+    try:
+        parsed = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    summaries = {}
+    for key in keys:
+        summary = parsed.get(key)
+        if isinstance(summary, list):
+            summary = "\n".join(f"* {point}" for point in summary if isinstance(point, str))
+        if isinstance(summary, str) and summary.strip():
+            summaries[key] = summary.strip()
+    return summaries
+
+@timed("news.summarize_batch_with_gemini")
+def summarize_batch_with_gemini(articles):
+    """
+    Summarizes several articles with one Gemini request. `articles` is a list of
+    dicts with 'key', 'title' and 'content'; returns a dict of key -> summary.
+    Articles missing from (or malformed in) the batch response are retried
+    one at a time with summarize_with_gemini.
+    """
+    eligible = [a for a in articles if a['content'] and len(a['content'].strip()) >= 150]
+    compressed = {a['key']: compress(a['content'], ARTICLE_TOKEN_BUDGET) for a in eligible}
+    eligible = [a for a in eligible if compressed[a['key']].strip()]
+    if not eligible:
+        return {}
+
+    model = genai.GenerativeModel('gemini-1.5-flash-latest')
+    sources = "\n\n".join(
+        f'ARTICLE ID: "{a["key"]}"\nARTICLE TITLE: "{a["title"]}"\nARTICLE CONTENT: "{compressed[a["key"]]}"'
+        for a in eligible
+    )
+    prompt = f"""
+    You are an expert news analyst. Summarize each of the following news articles in 3-4 clear and concise bullet points.
+    Focus on the key takeaways and essential information.
+    Respond with a single JSON object whose keys are the ARTICLE IDs and whose values are the summaries as strings.
+
+    {sources}
+    """
+    summaries = {}
+    try:
+        text = get_llm_cache().generate(model, prompt, params={"response_mime_type": "application/json"})
+        summaries = _parse_batch_summaries(text, [a['key'] for a in eligible])
+    except Exception as e:
+        print(f"Batch summarization failed, retrying articles individually: {e}")
+
+    for article in eligible:
+        if article['key'] not in summaries:
+            summary = summarize_with_gemini(article['content'], article['title'])
+            if summary:
+                summaries[article['key']] = summary
+    return summaries
+
+# --- 2. PIPELINE ---
+_DONE = object()
+
+async def _run_stage(worker, inbox, outbox, concurrency, fan_out=False):
+    """
+    Runs `concurrency` copies of `worker` over items from `inbox`.
+    Non-None results are forwarded to `outbox` (each element separately when
+    `fan_out` is set); a _DONE marker is passed on once every copy has drained
+    the inbox. An item whose worker raises is logged, counted and dropped, so
+    one bad article never stops the rest of the run.
+    """
+    async def run():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                await inbox.put(_DONE)  # let sibling workers see it too
+                return
+            try:
+                result = await worker(item)
+            except Exception as e:
+                count(f"news.{worker.__name__}.errors")
+                print(f"Pipeline stage '{worker.__name__}' failed on one item: {e!r}")
+                continue
+            if result is None or outbox is None:
                 continue
-            article_content = get_article_content_from_url(final_url)
-            if article_content:
-                summary = summarize_with_gemini(article_content, title)
-                article = {
-                    'title': title,
-                    'content': article_content,
-                    'summary': summary,
-                    'url': final_url
-                    }
-                article_id = db.insert_article(article)
-                print(f"Inserted article with ID {article_id} into the database.")
+            for r in (result if fan_out else [result]):
+                await outbox.put(r)
+
+    await asyncio.gather(*(run() for _ in range(concurrency)))
+    if outbox is not None:
+        await outbox.put(_DONE)
 
+
+async def _batch(inbox, outbox, size, max_wait):
+    """Groups items from `inbox` into lists of up to `size`, flushing early after `max_wait` idle seconds."""
+    batch = []
+    while True:
+        try:
+            item = await asyncio.wait_for(inbox.get(), timeout=max_wait if batch else None)
+        except asyncio.TimeoutError:
+            await outbox.put(batch)
+            batch = []
+            continue
+        if item is _DONE:
+            if batch:
+                await outbox.put(batch)
+            await outbox.put(_DONE)
+            return
+        batch.append(item)
+        if len(batch) >= size:
+            await outbox.put(batch)
+            batch = []
+
+
+async def run_pipeline(entries, pool, http_client, db, redirect_cache, seen, near_dups, http_cache):
+    """
+    Pushes feed entries through resolve -> download/parse -> summarize -> persist.
+    Every stage has its own concurrency limit and the stages are joined by bounded
+    queues, so a run costs roughly as much as its slowest stage.
+    """
+    resolve_q = asyncio.Queue(QUEUE_SIZE)
+    download_q = asyncio.Queue(QUEUE_SIZE)
+    summarize_q = asyncio.Queue(QUEUE_SIZE)
+    batch_q = asyncio.Queue(STAGE_CONCURRENCY['summarize'])
+    persist_q = asyncio.Queue(QUEUE_SIZE)
+    inserted = 0
+    index = {entry.link: i for i, entry in enumerate(entries)}
+    resolve_counts = {'http': 0, 'browser': 0}
+    # Where each article's HTML came from: the resolver (browser page or redirect chase) or an HTTP fetch
+    html_sources = {'resolver': 0, 'http': 0}
+    # Expensive operations skipped because the entry was already ingested
+    avoided = {'resolve': 0, 'download': 0, 'summarize': 0}
+    resolve_seconds = []
+
+    async def resolve(entry):
+        html = None
+        cached, final_url = redirect_cache.get(entry.link)
+        if not cached:
+            start = time.perf_counter()
+            final_url, response = await resolve_without_browser(http_client, entry.link)
+            if final_url or not is_google_news_url(entry.link):
+                # A plain link the HTTP chase could not resolve won't fare better in a browser
+                resolve_counts['http'] += 1
+                if response is not None:
+                    # The chase already downloaded the publisher page; hand it on
+                    html = http_cache.store(final_url, response)
             else:
+                async with pool.page() as page:
+                    final_url, html = await resolve_final_url(page, entry.link)
+                resolve_counts['browser'] += 1
+            resolve_seconds.append(time.perf_counter() - start)
+            redirect_cache.put(entry.link, final_url)
+        if not final_url or "news.google.com" in final_url:
+            return None
+        if seen.contains('url', final_url):
+            avoided['download'] += 1
+            avoided['summarize'] += 1
+            return None
+        return {'key': str(index[entry.link]), 'title': entry.title, 'url': final_url,
+                'guid': entry.get('id'), 'link': entry.link, 'html': html}
+
+    pending_signatures = []  # articles of this run that are not persisted yet
+    pending_copies = {}  # url -> near-duplicates found before that article was persisted
+    near_duplicates = 0
+
+    def find_near_duplicate(signature):
+        match = near_dups.find_near_duplicate(signature)
+        if match:
+            return match[0]
+        for url, other in pending_signatures:
+            if estimate_similarity(signature, other) >= near_dups.threshold:
+                return url
+        return None
+
+    async def download(item):
+        nonlocal near_duplicates
+        html = item.pop('html')
+        if html:
+            html_sources['resolver'] += 1
+        else:
+            html = await http_cache.fetch(http_client, item['url'])
+            html_sources['http'] += 1
+        if not html:
+            return None
+        content = await asyncio.to_thread(get_article_content_from_url, item['url'], html)
+        if not content:
+            return None
+        item['content'] = content
+        item['signature'] = await asyncio.to_thread(near_dups.signature, content)
+        cluster = find_near_duplicate(item['signature'])
+        if cluster:
+            # Syndicated copy of a story we already have: skip the Gemini call
+            near_duplicates += 1
+            count("news.near_duplicates")
+            # Another outlet running the story raises its ranking score
+            if not db.add_copy(cluster):
+                pending_copies[cluster] = pending_copies.get(cluster, 0) + 1
+            avoided['summarize'] += 1
+            near_dups.add(item['url'], item['signature'], cluster_key=cluster)
+            seen.add(guid=item['guid'], link=item['link'], url=item['url'])
+            return None
+        pending_signatures.append((item['url'], item['signature']))
+        return item
+
+    async def summarize(batch):
+        summaries = await asyncio.to_thread(summarize_batch_with_gemini, batch)
+        for item in batch:
+            item['summary'] = summaries.get(item['key'])
+        return batch
+
+    async def persist(item):
+        nonlocal inserted
+        item['copies'] = 1 + pending_copies.pop(item['url'], 0)
+        article_id = db.insert_article(item)
+        if article_id:
+            inserted += 1
+            count("news.articles_inserted")
+            seen.add(guid=item['guid'], link=item['link'], url=item['url'])
+            near_dups.add(item['url'], item['signature'])
+        print(f"Inserted article with ID {article_id} into the database.")
+
+    async def feed():
+        for entry in entries:
+            if seen.contains('guid', entry.get('id')) or seen.contains('link', entry.link):
+                avoided['resolve'] += 1
+                avoided['download'] += 1
+                avoided['summarize'] += 1
                 continue
-        browser.close()
-    db.close_connection()
+            await resolve_q.put(entry)
+        await resolve_q.put(_DONE)
+
+    await asyncio.gather(
+        feed(),
+        _run_stage(resolve, resolve_q, download_q, STAGE_CONCURRENCY['resolve']),
+        _run_stage(download, download_q, summarize_q, STAGE_CONCURRENCY['download']),
+        _batch(summarize_q, batch_q, SUMMARY_BATCH_SIZE, SUMMARY_BATCH_WAIT),
+        _run_stage(summarize, batch_q, persist_q, STAGE_CONCURRENCY['summarize'], fan_out=True),
+        _run_stage(persist, persist_q, None, STAGE_CONCURRENCY['persist']),
+    )
+    print(f"Redirect cache: {redirect_cache.stats()}, LLM cache: {get_llm_cache().stats()}")
+    print(f"Article HTML: {html_sources['resolver']} reused from the resolver, {html_sources['http']} fetched "
+          f"over HTTP (page cache: {http_cache.stats()}).")
+    print(f"Skipped {near_duplicates} near-duplicate articles before summarization.")
+    print(f"Skipped already-ingested entries, avoiding {avoided['resolve']} resolutions, "
+          f"{avoided['download']} downloads and {avoided['summarize']} Gemini calls.")
+    if resolve_seconds:
+        print(f"Resolved {resolve_counts['http']} links over HTTP, {resolve_counts['browser']} in the browser "
+              f"(median {statistics.median(resolve_seconds):.2f}s).")
+    return inserted
+
+
+async def _main(articles_to_process, db=None):
+    owns_db = db is None
+    db = db or DatabaseNews()
+    feeds = FeedRegistry(db.db_path)
+    redirect_cache = RedirectCache()
+    redirect_cache.evict()
+    http_cache = HttpCache()
+    http_cache.evict()
+    seen = SeenEntries(db.db_path)
+    near_dups = MinHashIndex(db.db_path, 'article', threshold=NEAR_DUPLICATE_THRESHOLD)
+
+    http_client = httpx.AsyncClient(
+        headers={'User-Agent': config.browser_user_agent},
+        timeout=config.request_timeout,
+        follow_redirects=True,
+    )
+    playwright = None
+
+    async def launch_browser():
+        # Only called if some link needs the browser fallback
+        nonlocal playwright
+        if playwright is None:
+            playwright = await async_playwright().start()
+        try:
+            return await playwright.chromium.launch()
+        except Exception:
+            await playwright.stop()
+            playwright = None
+            raise
+
+    pool = BrowserPool(launch_browser, size=BROWSER_POOL_SIZE)
+    try:
+        async with http_client:
+            entries = await fetch_feeds(http_client, feeds)
+            print(f"Processing up to {articles_to_process} articles...")
+            start = time.perf_counter()
+            inserted = await run_pipeline(entries[:articles_to_process], pool, http_client, db, redirect_cache, seen, near_dups, http_cache)
+            print(f"Inserted {inserted} articles in {time.perf_counter() - start:.1f}s.")
+            print(f"Resolver pool: {pool.stats()}")
+    finally:
+        await pool.close()
+        if playwright is not None:
+            await playwright.stop()
+        feeds.close_connection()
+        redirect_cache.close_connection()
+        http_cache.close_connection()
+        seen.close_connection()
+        near_dups.close_connection()
+        if owns_db:
+            db.close_connection()
+
+
+def main(articles_to_process=15, db=None):
+    """Runs the news pipeline. Pass `db` to reuse an open DatabaseNews (it is left open)."""
+    try:
+        configure_gemini()
+    except ValueError as e:
+        print(f"Error configuring Gemini API: {e}")
+        return
+    asyncio.run(_main(articles_to_process, db))
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    export_run()
+    print(f"Timings:\n{METRICS.summary()}")
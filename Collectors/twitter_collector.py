@@ -1,17 +1,21 @@
 import os
-from dotenv import load_dotenv
-from apify_client import ApifyClient
+from apify_client import ApifyClientAsync
 import re
 import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+from datetime import datetime
+from itertools import islice
+if not __package__:  # run as a script rather than through `python -m Pipeline`
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from Database.tweets_db import DatabaseTweets
+from Database.minhash_index import MinHashIndex
+from Pipeline.config import require_env
+from metrics import METRICS, span, timed_aiter, export_run
 
-load_dotenv()
-APIFY_API_KEY = os.getenv("APIFY_API_KEY")
-APIFY_API_KEY_TRENDS = os.getenv("APIFY_API_KEY_TRENDS")
 
-if not APIFY_API_KEY:
-    raise ValueError("APIFY_API_KEY not found. Please set it in your .env file.")
+def get_apify_client():
+    """Creates the Apify client from APIFY_API_KEY; raises ValueError if it is not set."""
+    return ApifyClientAsync(require_env("APIFY_API_KEY"))
 
 
 
@@ -55,91 +59,294 @@ def get_tweet_volume(volume_str: str | None) -> int:
     # Fallback
     return 0
 
-def fetch_trending_topics():
+TRENDS_ACTOR = "buk0BEIinZ6vfMEq1"
+TWEET_SCRAPER_ACTOR = "apidojo/tweet-scraper"
+# Per-topic scraper runs allowed in flight at once
+APIFY_CONCURRENCY = 5
+# Tweets scraped per collection, split across the topics' runs
+TWEET_BUDGET = 100
+
+async def fetch_trending_topics(client=None):
     # Initialize the ApifyClient with your API token
-    client = ApifyClient(APIFY_API_KEY)
+    client = client or get_apify_client()
 
     # Prepare the Actor input
     run_input = { "country": "india" }
 
     # Run the Actor and wait for it to finish
-    run = client.actor("buk0BEIinZ6vfMEq1").call(run_input=run_input)
+    with span("apify.call"):
+        run = await client.actor(TRENDS_ACTOR).call(run_input=run_input)
     trending_topics = []
 
     # Fetch and print Actor results from the run's dataset (if there are any)
-    for item in client.dataset(run["defaultDatasetId"]).iterate_items():
+    async for item in timed_aiter("apify.iterate_items", client.dataset(run["defaultDatasetId"]).iterate_items()):
         trending_topics.append({"topic": item.get("topic", "Unknown Topic"),
                                 "tweet_volume": get_tweet_volume(item.get("tweet_volume", None))})
     
     return trending_topics
 
-        
-
-
 
+def tweet_id_of(item):
+    """Tweet ids are snowflakes: numeric and increasing with time."""
+    try:
+        return int(item.get('id'))
+    except (TypeError, ValueError):
+        return None
 
-def fetch_twitter_trends(trends, max_trend_items = 20,max_tweet_items=50):
-    client = ApifyClient(APIFY_API_KEY)
+def parse_created_at(value):
+    """Parses the scraper's "Fri Nov 24 17:49:36 +0000 2023" timestamps into ISO 8601."""
+    try:
+        return datetime.strptime(value, "%a %b %d %H:%M:%S %z %Y").isoformat()
+    except (TypeError, ValueError):
+        return None
 
-    actor_id = "apidojo/tweet-scraper"
-
-    # Manually provide trending topics as searchTerms
+async def _run_topic_scrape(client, semaphore, topic, max_tweet_items, watermark=None):
+    """Starts one scraper run for a single search term and waits for it to finish."""
     run_input = {
-        "searchTerms": trends[:max_trend_items], 
+        "searchTerms": [topic],
         "maxItems": max_tweet_items,
         "sort": "Top"
     }
+    if watermark and watermark[1]:
+        # Only ask for tweets from the day of the newest one we already have;
+        # anything at or below the watermark id is cut off client-side.
+        run_input["start"] = watermark[1][:10]
+    async with semaphore:
+        with span("apify.call"):
+            run = await client.actor(TWEET_SCRAPER_ACTOR).call(run_input=run_input)
+    return topic, run
 
-    actor_run = client.actor(actor_id).call(run_input=run_input)
-    dataset_items = []
 
-    for item in client.dataset(actor_run['defaultDatasetId']).iterate_items():
-        dataset_items.append(item)
+def split_budget(total, parts):
+    """Splits `total` items over `parts` runs as evenly as possible; earlier runs get the remainder."""
+    base, extra = divmod(total, parts)
+    return [base + (i < extra) for i in range(parts)]
 
-    return dataset_items
 
-def main():
-    db = DatabaseTweets()
+async def fetch_twitter_trends(trends, max_trend_items = 20,max_tweet_items=50, client=None,
+                               concurrency=APIFY_CONCURRENCY, watermarks=None):
+    """
+    Scrapes each trend in its own actor run, at most `concurrency` at a time,
+    and yields (topic, raw item) pairs as soon as each run completes, so one
+    slow topic no longer holds back the others. `max_tweet_items` is the
+    budget for the whole collection and is split across the runs, so
+    scraping (and billing) stays the same as one run over every term. With
+    `watermarks` ({topic: (last_tweet_id, last_created_at)}) only newer
+    tweets are yielded.
+    """
+    client = client or get_apify_client()
+    watermarks = watermarks or {}
+    semaphore = asyncio.Semaphore(concurrency)
+    topics = trends[:max_trend_items]
+    budgets = split_budget(max_tweet_items, len(topics)) if topics else []
+    tasks = [asyncio.create_task(_run_topic_scrape(client, semaphore, topic, budget, watermarks.get(topic)))
+             for topic, budget in zip(topics, budgets) if budget > 0]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            try:
+                topic, run = await finished
+            except Exception as e:
+                print(f"Tweet scrape failed for one topic: {e}")
+                continue
+            if not run:
+                continue
+            cutoff = watermarks.get(topic, (None, None))[0]
+            async for item in timed_aiter("apify.iterate_items", client.dataset(run['defaultDatasetId']).iterate_items()):
+                if cutoff is not None and (tweet_id_of(item) or 0) <= cutoff:
+                    continue
+                yield topic, item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+# --- Streaming stages: raw items -> filter -> projection -> batched insert ---
+# Each stage is a generator, so only one raw item (plus one batch of projected
+# rows) is alive at a time no matter how large the dataset is.
+INSERT_BATCH_SIZE = 500
+# Raw items store_tweets_async takes from the async stream per pass through the stages
+RAW_CHUNK_SIZE = 50
+# Retweet-like copies: tweets are short, so compare word pairs rather than triples
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+def filter_by_views(items, minimum_views):
+    for item in items:
+        if (item.get('viewCount') or 0) >= minimum_views:
+            yield item
+
+def project_tweet(tweet):
+    """Keeps only the columns we store from a (large, nested) scraper item."""
+    return {
+        'id': tweet.get('id'),
+        'text': tweet.get('fullText','').lower(),
+        'author': tweet.get('author',{}).get('userName','UnknownUser'),
+        'url': tweet.get('url'),
+        'replyCount': tweet.get('replyCount',0),
+        'likeCount': tweet.get('likeCount',0),
+        'viewCount': tweet.get('viewCount', 0),
+        'createdAt': parse_created_at(tweet.get('createdAt'))
+    }
 
-    trending_topics = fetch_trending_topics()
-    for item in trending_topics:
-        db.insert_trend(item)
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def is_near_duplicate(near_dups, row):
+    """Checks a projected tweet against the index and indexes it when it is new."""
+    signature = near_dups.signature(row['text'])
+    if near_dups.find_near_duplicate(signature):
+        return True
+    near_dups.add(row['url'], signature)
+    return False
+
+async def abatched(aiterable, size):
+    """Async counterpart of batched()."""
+    batch = []
+    async for item in aiterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def drop_near_duplicates(rows, near_dups, totals):
+    for row in rows:
+        if near_dups and is_near_duplicate(near_dups, row):
+            totals['near_duplicates'] += 1
+            continue
+        yield row
+
+def tweet_rows(items, minimum_views, near_dups, totals):
+    """Chains the filter, projection and near-duplicate stages over raw items."""
+    rows = (project_tweet(tweet) for tweet in filter_by_views(items, minimum_views))
+    return drop_near_duplicates(rows, near_dups, totals)
+
+def insert_batch(db, batch, totals):
+    """Inserts one batch; returns False if the insert failed (every row is then counted as neither)."""
+    counts = db.insert_tweets(batch)
+    totals['inserted'] += counts['inserted']
+    totals['ignored'] += counts['ignored']
+    if counts['inserted'] + counts['ignored'] < len(batch):
+        totals['failed_batches'] += 1
+        return False
+    return True
+
+def advance_newest(newest, rows):
+    """Raises {topic: (tweet_id, created_at)} to the newest of `rows`, which must all be stored."""
+    for row in rows:
+        tweet_id = tweet_id_of(row)
+        if tweet_id is not None and tweet_id > newest.get(row['topic'], (0, None))[0]:
+            newest[row['topic']] = (tweet_id, row['createdAt'])
+
+def store_tweets(db, items, minimum_views=10000, batch_size=INSERT_BATCH_SIZE, near_dups=None):
+    """Streams raw items through the filter/projection stages into the database. Returns insert counts."""
+    totals = {'inserted': 0, 'ignored': 0, 'near_duplicates': 0, 'failed_batches': 0}
+    for batch in batched(tweet_rows(items, minimum_views, near_dups, totals), batch_size):
+        insert_batch(db, batch, totals)
+    return totals
+
+async def store_tweets_async(db, topic_items, minimum_views=10000, batch_size=INSERT_BATCH_SIZE, near_dups=None,
+                             newest=None):
+    """
+    Async counterpart of store_tweets for the (topic, item) stream of
+    fetch_twitter_trends. Raw items are taken RAW_CHUNK_SIZE at a time and
+    pushed through the same stages; kept rows are inserted in batches of
+    `batch_size`. If `newest` is given, it is advanced (see advance_newest)
+    from the rows of every batch that was stored.
+    """
+    totals = {'inserted': 0, 'ignored': 0, 'near_duplicates': 0, 'failed_batches': 0}
+    pending = []
+
+    def flush(batch):
+        if insert_batch(db, batch, totals) and newest is not None:
+            advance_newest(newest, batch)
+
+    async for chunk in abatched(topic_items, RAW_CHUNK_SIZE):
+        topics = {item.get('id'): topic for topic, item in chunk}
+        for row in tweet_rows((item for _topic, item in chunk), minimum_views, near_dups, totals):
+            row['topic'] = topics[row['id']]
+            pending.append(row)
+        while len(pending) >= batch_size:
+            flush(pending[:batch_size])
+            del pending[:batch_size]
+    if pending:
+        flush(pending)
+    return totals
+
+async def collect(db, client=None):
+    client = client or get_apify_client()
+
+    trending_topics = await fetch_trending_topics(client)
+    db.insert_trends(trending_topics)
+    db.downsample_trends()
+    rising = db.fastest_rising_topics(hours=6, limit=5)
+    if rising:
+        print("Fastest rising topics (6h): " + ", ".join(f"{r['topic']} (+{r['rise']:.0f})" for r in rising))
 
     trending_topics_filtered = [item['topic'] for item in sorted(trending_topics, key=lambda x: x['tweet_volume'], reverse=True)]
-    
-    raw_trending_tweets = fetch_twitter_trends(trending_topics_filtered, max_trend_items=5, max_tweet_items=100) 
-    minimum_views = 10000 
-    trending_tweets_with_views = [
-        tweet for tweet in raw_trending_tweets 
-        if tweet.get('viewCount', 0) >= minimum_views
-    ]
-
-    if trending_tweets_with_views:
-        for tweet in trending_tweets_with_views:
-            text_lower = tweet.get('fullText','').lower()
-            id = tweet.get('id')
-            url = tweet.get('url')
-            like_count = tweet.get('likeCount',0)
-            reply_count = tweet.get('replyCount',0)
-            author = tweet.get('author',{}).get('userName','UnknownUser')
-            view_count = tweet.get('viewCount', 0)
-
-            db.insert_tweet({
-                'id':id,
-                'text': text_lower,
-                'author': author,
-                'url': url,
-                'replyCount': reply_count,
-                'likeCount': like_count,
-                'viewCount': view_count
-            })
-
+    max_trend_items = 5
+    watermarks = db.get_watermarks(trending_topics_filtered[:max_trend_items])
+    # Newest stored tweet per topic becomes next run's watermark
+    newest = {}
+    raw_trending_tweets = fetch_twitter_trends(trending_topics_filtered, max_trend_items=max_trend_items,
+                                               max_tweet_items=TWEET_BUDGET, client=client, watermarks=watermarks)
+    near_dups = MinHashIndex(db.db_path, 'tweet', threshold=NEAR_DUPLICATE_THRESHOLD, shingle_size=2)
+    counts = await store_tweets_async(db, raw_trending_tweets, minimum_views=10000, near_dups=near_dups,
+                                      newest=newest)
+    near_dups.close_connection()
+    if counts['failed_batches']:
+        # Tweets of a failed batch may be older than the newest stored one; keep the old watermarks
+        print(f"⚠️ {counts['failed_batches']} tweet batch(es) failed to insert; watermarks not advanced.")
+    else:
+        db.update_watermarks(newest)
+    print(f"Tweets: {counts['inserted']} inserted, {counts['ignored']} already stored, "
+          f"{counts['near_duplicates']} near-duplicates dropped before generation "
+          f"({len(watermarks)} of {min(max_trend_items, len(trending_topics_filtered))} topics collected incrementally).")
+    return counts
+
+def run_dry(runs=2, topics=8, error_rate=0.0):
+    """
+    Exercises collect() offline: a throwaway in-memory database and the local
+    Apify stand-in from Collectors/fake_apify.py. Later runs show the watermark
+    cut-off. Returns each run's counts and the maxItems of its scraper runs.
+    """
+    from Collectors.fake_apify import FakeApifyClientAsync
+
+    client = FakeApifyClientAsync(topics=topics, tweets_per_topic=TWEET_BUDGET, error_rate=error_rate,
+                                  seed=42, respect_max_items=True)
+    db = DatabaseTweets(db_path=':memory:')
+    results = []
+    for _ in range(runs):
+        client.runs.clear()
+        counts = asyncio.run(collect(db, client))
+        counts['max_items'] = [r['maxItems'] for r in client.runs if 'maxItems' in r]
+        results.append(counts)
     db.close_connection()
+    for i, counts in enumerate(results, 1):
+        print(f"Dry run {i}: {counts} (budget {TWEET_BUDGET}, scraped up to {sum(counts['max_items'])})")
+    return results
 
+def main(db=None, dry_run=False):
+    """
+    Runs one collection. Pass `db` to reuse an open DatabaseTweets (it is left
+    open). With dry_run=True a local fake Apify client is used instead.
+    """
+    if dry_run:
+        return run_dry()
+    try:
+        client = get_apify_client()
+    except ValueError as e:
+        print(f"Error configuring Apify: {e}")
+        return
+    owns_db = db is None
+    db = db or DatabaseTweets()
+    asyncio.run(collect(db, client))
+    if owns_db:
+        db.close_connection()
 
 
-
-
-    
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(dry_run="--dry-run" in sys.argv)
+    export_run()
+    print(f"Timings:\n{METRICS.summary()}")
@@ -1,2 +1,9 @@
 from .news_db import DatabaseNews
-from .tweets_db import DatabaseTweets
\ No newline at end of file
+from .tweets_db import DatabaseTweets
+from .redirect_cache import RedirectCache
+from .seen_entries import SeenEntries
+from .llm_cache import LLMCache
+from .minhash_index import MinHashIndex
+from .http_cache import HttpCache
+from .feed_registry import FeedRegistry
+from .run_metrics import RunMetrics
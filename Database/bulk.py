@@ -0,0 +1,27 @@
+import sqlite3
+import logging
+from metrics import span
+
+def executemany_counted(conn, sql, rows, label="rows"):
+    """
+    Runs `sql` for every parameter tuple in `rows` inside a single transaction.
+    `rows` may be any iterable (it is streamed, never materialized). Returns a
+    dict with the number of rows inserted and ignored (e.g. by INSERT OR IGNORE).
+    """
+    processed = 0
+
+    def counted():
+        nonlocal processed
+        for row in rows:
+            processed += 1
+            yield row
+
+    before = conn.total_changes
+    try:
+        with span(f"db.insert_{label.replace(' ', '_')}"), conn:
+            conn.executemany(sql, counted())
+    except sqlite3.Error as e:
+        logging.error(f"Error inserting {label}: {e}")
+        return {'inserted': 0, 'ignored': 0}
+    inserted = conn.total_changes - before
+    return {'inserted': inserted, 'ignored': processed - inserted}
@@ -0,0 +1,81 @@
+import sqlite3
+import logging
+import json
+import time
+from .migrations import connect, migrate, NEWS_MIGRATIONS
+
+class FeedRegistry:
+    """
+    The RSS feeds the news collector reads, with the ETag/Last-Modified
+    validators from each feed's last download and the entries it returned.
+    An unchanged feed answers a conditional GET with 304, and its stored
+    entries are reused without downloading or parsing it again.
+    """
+
+    def __init__(self, db_path='database/news.db'):
+        self.db_path = db_path
+        self.conn = self._create_connection()
+        self._create_table()
+
+    def _create_connection(self):
+        """Creates and returns a database connection."""
+        conn = connect(self.db_path)
+        return conn
+
+    def _create_table(self):
+        """Brings news.db, including the feeds table, up to date."""
+        try:
+            migrate(self.conn, NEWS_MIGRATIONS)
+        except sqlite3.Error as e:
+            logging.error(f"Error migrating database: {e}")
+
+    def register(self, urls):
+        """Adds feeds to the registry; feeds that are already registered keep their state."""
+        try:
+            self.conn.executemany("INSERT OR IGNORE INTO feeds(url) VALUES(?)", ((url,) for url in urls))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error registering feeds: {e}")
+
+    def get(self, url):
+        """Returns a feed's stored state as a dict (entries decoded), or None if it isn't registered."""
+        try:
+            row = self.conn.execute(
+                "SELECT url, etag, last_modified, last_status, last_fetched_at, entries FROM feeds WHERE url = ?",
+                (url,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Error reading feed {url}: {e}")
+            return None
+        if not row:
+            return None
+        keys = ('url', 'etag', 'last_modified', 'last_status', 'last_fetched_at', 'entries')
+        feed = dict(zip(keys, row))
+        feed['entries'] = json.loads(feed['entries']) if feed['entries'] else []
+        return feed
+
+    def update(self, url, status, etag=None, last_modified=None, entries=None):
+        """
+        Records the outcome of a fetch. A 200 replaces the validators and the
+        stored entries; any other status only updates status and fetch time.
+        """
+        now = int(time.time())
+        try:
+            if status == 200:
+                self.conn.execute(
+                    """UPDATE feeds SET etag = ?, last_modified = ?, last_status = ?, last_fetched_at = ?, entries = ?
+                       WHERE url = ?""",
+                    (etag, last_modified, status, now, json.dumps(entries or []), url),
+                )
+            else:
+                self.conn.execute("UPDATE feeds SET last_status = ?, last_fetched_at = ? WHERE url = ?",
+                                  (status, now, url))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error updating feed {url}: {e}")
+
+    def close_connection(self):
+        """Closes the database connection."""
+        if self.conn:
+            self.conn.close()
+            logging.info("Database connection closed.")
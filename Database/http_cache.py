@@ -0,0 +1,135 @@
+import sqlite3
+import logging
+import time
+from .migrations import connect
+
+class HttpCache:
+    """
+    On-disk cache of fetched article pages keyed by URL, with the ETag and
+    Last-Modified validators the server sent. A refetch sends them back as
+    a conditional GET, and a 304 answer reuses the stored body instead of
+    downloading the page again.
+    """
+
+    def __init__(self, db_path='database/http_cache.db', ttl=3 * 24 * 3600, max_entries=5000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.conn = self._create_connection()
+        self._create_table()
+
+    def _create_connection(self):
+        """Creates and returns a database connection."""
+        conn = connect(self.db_path)
+        return conn
+
+    def _create_table(self):
+        """Creates the http_cache table if it doesn't exist."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache(
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT NOT NULL,
+                fetched_at INTEGER NOT NULL
+            )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_fetched_at ON http_cache(fetched_at)")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error creating table: {e}")
+
+    def get(self, url):
+        """Returns (etag, last_modified, body) for a cached page, or None."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT etag, last_modified, body, fetched_at FROM http_cache WHERE url = ?", (url,))
+            row = cursor.fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Error reading http cache: {e}")
+            return None
+        if not row or time.time() - row[3] >= self.ttl:
+            return None
+        return row[:3]
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """Stores a page. Pages without validators can't be revalidated and are not cached."""
+        if not etag and not last_modified:
+            return
+        sql = ''' INSERT OR REPLACE INTO http_cache(url, etag, last_modified, body, fetched_at)
+                  VALUES(?,?,?,?,?) '''
+        try:
+            self.conn.execute(sql, (url, etag, last_modified, body, int(time.time())))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error writing http cache: {e}")
+
+    def touch(self, url):
+        """Marks a cached page as revalidated (after a 304)."""
+        try:
+            self.conn.execute("UPDATE http_cache SET fetched_at = ? WHERE url = ?", (int(time.time()), url))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error writing http cache: {e}")
+
+    async def fetch(self, client, url):
+        """
+        GETs `url` with the shared httpx client, revalidating a cached copy if
+        there is one. Returns the page HTML, or None if it couldn't be fetched.
+        """
+        cached = self.get(url)
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        try:
+            response = await client.get(url, headers=headers)
+        except Exception as e:
+            logging.error(f"Error fetching {url}: {e}")
+            return cached[2] if cached else None
+        if response.status_code == 304 and cached:
+            self.hits += 1
+            self.touch(url)
+            return cached[2]
+        if response.status_code != 200:
+            return None
+        return self.store(url, response)
+
+    def store(self, url, response):
+        """Caches a page fetched elsewhere (e.g. at the end of a redirect chase) and returns its HTML."""
+        self.misses += 1
+        self.put(url, response.text, response.headers.get('etag'), response.headers.get('last-modified'))
+        return response.text
+
+    def evict(self):
+        """Drops expired pages, then the oldest ones above max_entries."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM http_cache WHERE fetched_at < ?", (int(time.time()) - self.ttl,))
+            expired = cursor.rowcount
+            cursor.execute("""
+            DELETE FROM http_cache WHERE url IN (
+                SELECT url FROM http_cache ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+            )
+            """, (self.max_entries,))
+            self.conn.commit()
+            return expired + cursor.rowcount
+        except sqlite3.Error as e:
+            logging.error(f"Error evicting http cache: {e}")
+            return 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close_connection(self):
+        """Closes the database connection."""
+        if self.conn:
+            self.conn.close()
+            logging.info("Database connection closed.")
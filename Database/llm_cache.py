@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import logging
+import hashlib
+import json
+import threading
+import time
+from .migrations import connect
+from metrics import timed, count
+
+class LLMCache:
+    """
+    Content-addressed cache of LLM responses, shared by the collector and the
+    generator. Entries are keyed by a hash of model name, prompt and generation
+    parameters, expire after `ttl` seconds and are evicted least-recently-used
+    first once the stored responses exceed `max_bytes`.
+    """
+
+    def __init__(self, db_path='database/llm_cache.db', ttl=14 * 24 * 3600, max_bytes=50 * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = os.getenv("LLM_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+        self.hits = 0
+        self.misses = 0
+        # Summaries are generated from worker threads, so the connection is shared under a lock
+        self._lock = threading.Lock()
+        self.conn = self._create_connection()
+        self._create_table()
+        self.evict()
+
+    def _create_connection(self):
+        """Creates and returns a database connection."""
+        conn = connect(self.db_path, check_same_thread=False)
+        return conn
+
+    def _create_table(self):
+        """Creates the llm_cache table if it doesn't exist."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache(
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at INTEGER NOT NULL,
+                last_used_at INTEGER NOT NULL
+            )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used_at)")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error creating table: {e}")
+
+    @staticmethod
+    def make_key(model_name, prompt, params=None):
+        payload = json.dumps({'model': model_name, 'prompt': prompt, 'params': params or {}},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Returns the cached response text, or None on a miss or an expired entry."""
+        now = int(time.time())
+        with self._lock:
+            try:
+                row = self.conn.execute(
+                    "SELECT response FROM llm_cache WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+                ).fetchone()
+                if row:
+                    self.conn.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+                    self.conn.commit()
+                    self.hits += 1
+                    return row[0]
+            except sqlite3.Error as e:
+                logging.error(f"Error reading LLM cache: {e}")
+            self.misses += 1
+            return None
+
+    def put(self, key, model_name, response):
+        now = int(time.time())
+        sql = ''' INSERT OR REPLACE INTO llm_cache(key, model, response, size, created_at, last_used_at)
+                  VALUES(?,?,?,?,?,?) '''
+        with self._lock:
+            try:
+                self.conn.execute(sql, (key, model_name, response, len(response.encode('utf-8')), now, now))
+                self.conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Error writing LLM cache: {e}")
+
+    def generate(self, model, prompt, params=None, use_cache=True):
+        """
+        Returns the text of `model.generate_content(prompt)`, served from the cache
+        when possible. Pass use_cache=False for deliberately randomized calls.
+        Exceptions from the model propagate; failed calls are never cached.
+        """
+        if not (use_cache and self.enabled):
+            return self._call(model, prompt, params)
+
+        model_name = getattr(model, 'model_name', str(model))
+        key = self.make_key(model_name, prompt, params)
+        cached = self.get(key)
+        if cached is not None:
+            count("llm_cache.hit")
+            return cached
+        count("llm_cache.miss")
+        text = self._call(model, prompt, params)
+        if text:
+            self.put(key, model_name, text)
+        return text
+
+    @staticmethod
+    @timed("gemini.generate_content")
+    def _call(model, prompt, params):
+        if params:
+            return model.generate_content(prompt, generation_config=params).text
+        return model.generate_content(prompt).text
+
+    def evict(self):
+        """Drops expired entries, then least recently used ones until the cache fits in max_bytes."""
+        now = int(time.time())
+        with self._lock:
+            try:
+                cursor = self.conn.cursor()
+                cursor.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+                removed = cursor.rowcount
+                cursor.execute("""
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY last_used_at DESC, key) AS running_size
+                        FROM llm_cache
+                    ) WHERE running_size > ?
+                )
+                """, (self.max_bytes,))
+                self.conn.commit()
+                return removed + cursor.rowcount
+            except sqlite3.Error as e:
+                logging.error(f"Error evicting LLM cache: {e}")
+                return 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close_connection(self):
+        """Closes the database connection."""
+        if self.conn:
+            self.conn.close()
+            logging.info("Database connection closed.")
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_llm_cache():
+    """Returns the process-wide LLMCache, opening it on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+    return _default_cache
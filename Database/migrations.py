@@ -0,0 +1,288 @@
+"""
+Versioned schema migrations for the news and tweets databases.
+
+Each database records the last applied version in `PRAGMA user_version`.
+Opening a database runs any newer migrations in order, each in its own
+transaction, so existing news.db / tweets.db files are upgraded in place.
+A migration step is either an SQL string or a callable taking the connection.
+Never edit a released migration; append a new version instead.
+"""
+import sqlite3
+from .ranking import register_functions
+
+# Applied to every connection. WAL lets readers (generator, publisher) run while a
+# collector is writing, and NORMAL sync is safe under WAL while avoiding an fsync per commit.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+
+def connect(db_path, **kwargs):
+    """Opens a SQLite connection with the project's standard pragmas applied."""
+    conn = sqlite3.connect(db_path, **kwargs)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# Shared by both databases: items of each kind live next to the table they describe
+_MINHASH_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS minhash_items(
+        kind TEXT NOT NULL,
+        item_key TEXT NOT NULL,
+        signature BLOB NOT NULL,
+        cluster_key TEXT NOT NULL,
+        PRIMARY KEY (kind, item_key)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS minhash_bands(
+        kind TEXT NOT NULL,
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        item_key TEXT NOT NULL,
+        PRIMARY KEY (kind, band, bucket, item_key)
+    ) WITHOUT ROWID
+    """,
+]
+
+
+def _seed_seen_entries(conn):
+    # Imported here: seen_entries imports this module
+    from .seen_entries import canonicalize_url
+    urls = conn.execute("SELECT url FROM news_articles")
+    conn.executemany("INSERT OR IGNORE INTO seen_entries(key) VALUES(?)",
+                     ((f"url:{canonicalize_url(url)}",) for (url,) in urls))
+
+
+NEWS_MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS news_articles(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            url TEXT NOT NULL UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    # fetch_latest_articles: ORDER BY created_at DESC LIMIT ?
+    (2, [
+        "CREATE INDEX IF NOT EXISTS idx_news_articles_created_at ON news_articles(created_at DESC)",
+    ]),
+    # Ranking: outlets that ran the story and a precomputed hot score (see ranking.py),
+    # so fetch_top_articles is a range scan on idx_news_articles_score. Nothing reads by
+    # created_at any more, so its index only slows inserts down.
+    (3, [
+        "ALTER TABLE news_articles ADD COLUMN copies INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE news_articles ADD COLUMN score REAL",
+        register_functions,
+        "UPDATE news_articles SET score = article_score(copies, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_news_articles_score ON news_articles(score DESC)",
+        "DROP INDEX IF EXISTS idx_news_articles_created_at",
+    ]),
+    # Near-duplicate index (minhash_index.py) and the seen-entries index, seeded with the
+    # canonical URL of every stored article
+    (4, _MINHASH_TABLES + [
+        """
+        CREATE TABLE IF NOT EXISTS seen_entries(
+            key TEXT PRIMARY KEY,
+            seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        _seed_seen_entries,
+    ]),
+    # Feed registry (feed_registry.py): conditional-GET validators and the last entries of each feed
+    (5, [
+        """
+        CREATE TABLE IF NOT EXISTS feeds(
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            last_status INTEGER,
+            last_fetched_at INTEGER,
+            entries TEXT,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+]
+
+def _rollup_table(name):
+    return f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            bucket INTEGER NOT NULL,
+            topic_id INTEGER NOT NULL,
+            samples INTEGER NOT NULL,
+            volume_sum INTEGER NOT NULL,
+            volume_max INTEGER NOT NULL,
+            last_at INTEGER NOT NULL,
+            last_volume INTEGER NOT NULL,
+            PRIMARY KEY (bucket, topic_id)
+        ) WITHOUT ROWID
+        """
+
+
+def _rollup_upsert(name, seconds):
+    return f"""
+            INSERT INTO {name}(bucket, topic_id, samples, volume_sum, volume_max, last_at, last_volume)
+            VALUES (NEW.observed_at / {seconds} * {seconds}, NEW.topic_id, 1, COALESCE(NEW.tweet_volume, 0),
+                    COALESCE(NEW.tweet_volume, 0), NEW.observed_at, COALESCE(NEW.tweet_volume, 0))
+            ON CONFLICT(bucket, topic_id) DO UPDATE SET
+                samples = samples + 1,
+                volume_sum = volume_sum + excluded.volume_sum,
+                volume_max = MAX(volume_max, excluded.volume_max),
+                last_volume = CASE WHEN excluded.last_at >= last_at THEN excluded.last_volume ELSE last_volume END,
+                last_at = MAX(last_at, excluded.last_at);"""
+
+
+TWEETS_MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS trending_topics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL UNIQUE,
+            tweet_volume INTEGER,
+            collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tweets (
+            id TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            author TEXT,
+            url TEXT NOT NULL UNIQUE,
+            reply_count INTEGER,
+            like_count INTEGER,
+            collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS generated_posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform TEXT NOT NULL,
+            content TEXT NOT NULL,
+            source_type TEXT,
+            source_url TEXT,
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    # fetch_top_tweets: ORDER BY like_count DESC, collected_at DESC LIMIT ?
+    # publisher: WHERE platform = 'Twitter' ORDER BY generated_at
+    (2, [
+        "CREATE INDEX IF NOT EXISTS idx_tweets_like_count ON tweets(like_count DESC, collected_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_generated_posts_platform ON generated_posts(platform, generated_at)",
+    ]),
+    # Publishing queue: posts are claimed with a lease, acknowledged or requeued,
+    # instead of being deleted before they are published.
+    (3, [
+        "ALTER TABLE generated_posts ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'",
+        "ALTER TABLE generated_posts ADD COLUMN claimed_by TEXT",
+        "ALTER TABLE generated_posts ADD COLUMN lease_expires_at INTEGER",
+        "ALTER TABLE generated_posts ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE generated_posts ADD COLUMN published_at TIMESTAMP",
+        "ALTER TABLE generated_posts ADD COLUMN remote_id TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_generated_posts_queue ON generated_posts(platform, status, generated_at)",
+    ]),
+    # Incremental collection: newest tweet collected per search term
+    (4, [
+        """
+        CREATE TABLE IF NOT EXISTS topic_watermarks (
+            search_term TEXT PRIMARY KEY,
+            last_tweet_id INTEGER NOT NULL,
+            last_created_at TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    # Ranking: views and tweet time are kept, and a precomputed hot score replaces the
+    # like_count sort (fetch_top_tweets is a range scan on idx_tweets_score)
+    (5, [
+        "ALTER TABLE tweets ADD COLUMN view_count INTEGER",
+        "ALTER TABLE tweets ADD COLUMN created_at TEXT",
+        "ALTER TABLE tweets ADD COLUMN score REAL",
+        register_functions,
+        "UPDATE tweets SET score = tweet_score(like_count, reply_count, view_count, collected_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tweets_score ON tweets(score DESC)",
+        "DROP INDEX IF EXISTS idx_tweets_like_count",
+    ]),
+    # Trend time series: trending_topics keeps one row per topic, so every later
+    # tweet_volume was dropped. Observations are appended with interned topic ids and
+    # epoch-second timestamps; a trigger keeps the hourly and daily rollups current, and
+    # existing trending_topics rows are backfilled as each topic's first observation.
+    (6, [
+        """
+        CREATE TABLE IF NOT EXISTS topics (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS trend_observations (
+            topic_id INTEGER NOT NULL,
+            observed_at INTEGER NOT NULL,
+            tweet_volume INTEGER,
+            PRIMARY KEY (topic_id, observed_at)
+        ) WITHOUT ROWID
+        """,
+        _rollup_table("trend_hourly"),
+        _rollup_table("trend_daily"),
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_trend_observations_rollup AFTER INSERT ON trend_observations
+        BEGIN{_rollup_upsert("trend_hourly", 3600)}{_rollup_upsert("trend_daily", 86400)}
+        END
+        """,
+        "INSERT OR IGNORE INTO topics(name) SELECT topic FROM trending_topics",
+        """
+        INSERT OR IGNORE INTO trend_observations(topic_id, observed_at, tweet_volume)
+        SELECT t.id, CAST(strftime('%s', tt.collected_at) AS INTEGER), tt.tweet_volume
+        FROM trending_topics tt JOIN topics t ON t.name = tt.topic
+        """,
+    ]),
+    # Publishing queue: published and failed posts are kept, so claim_post walks a partial
+    # index over open posts only. Neither older index could serve its status condition.
+    (7, [
+        """
+        CREATE INDEX IF NOT EXISTS idx_generated_posts_open ON generated_posts(platform, generated_at, id)
+        WHERE status IN ('pending', 'claimed')
+        """,
+        "DROP INDEX IF EXISTS idx_generated_posts_queue",
+        "DROP INDEX IF EXISTS idx_generated_posts_platform",
+    ]),
+    # Near-duplicate index for tweets (minhash_index.py)
+    (8, _MINHASH_TABLES),
+]
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, migrations):
+    """Applies every migration newer than the database's user_version. Returns the final version."""
+    current = get_version(conn)
+    for version, steps in migrations:
+        if version <= current:
+            continue
+        conn.execute("BEGIN")
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        current = version
+    return current
@@ -0,0 +1,150 @@
+import sqlite3
+import logging
+import hashlib
+import re
+from array import array
+from .migrations import connect, migrate, NEWS_MIGRATIONS, TWEETS_MIGRATIONS
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# 64 MinHash permutations split into 16 bands of 4 rows. Two texts become
+# candidates when any band matches, which happens with probability
+# 1 - (1 - J^4)^16: ~0.98 at Jaccard 0.6, ~0.13 at 0.3. Candidates are then
+# checked against the configured threshold, so thresholds below ~0.5 lose recall.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+
+def _permutations(num_perm):
+    # Fixed seeds: signatures must stay comparable across runs
+    params = []
+    for i in range(num_perm):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "little") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "little") % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+_PERMUTATIONS = _permutations(NUM_PERM)
+
+# articles are indexed in news.db, tweets in tweets.db
+_MIGRATIONS = {'article': NEWS_MIGRATIONS, 'tweet': TWEETS_MIGRATIONS}
+
+
+def shingles(text, size=3):
+    """Set of overlapping word n-grams of a text."""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return set()
+    size = min(size, len(words))
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text, shingle_size=3):
+    """MinHash signature (NUM_PERM 32-bit values) of a text's shingle set, or None for empty text."""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+              for s in shingles(text, shingle_size)]
+    if not hashes:
+        return None
+    return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: the share of permutations whose minimum agrees."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def _band_keys(signature):
+    for band in range(BANDS):
+        chunk = array("I", signature[band * ROWS:(band + 1) * ROWS]).tobytes()
+        # Signed 63-bit so it fits an SQLite INTEGER
+        yield band, int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little") >> 1
+
+
+class MinHashIndex:
+    """
+    Persistent locality-sensitive index of text signatures, used to spot
+    syndicated copies of the same story (or retweet-like copies of a tweet)
+    before paying for an LLM call. Items of one `kind` live in the database
+    of the table they describe. `threshold` is the estimated Jaccard
+    similarity of word shingles above which two texts count as duplicates.
+    """
+
+    def __init__(self, db_path, kind, threshold=0.8, shingle_size=3):
+        self.db_path = db_path
+        self.kind = kind
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.duplicates = 0
+        self.conn = self._create_connection()
+        self._create_tables()
+
+    def _create_connection(self):
+        """Creates and returns a database connection."""
+        conn = connect(self.db_path)
+        return conn
+
+    def _create_tables(self):
+        """Brings the owning database's schema, including the index tables, up to date."""
+        try:
+            migrate(self.conn, _MIGRATIONS[self.kind])
+        except sqlite3.Error as e:
+            logging.error(f"Error migrating database: {e}")
+
+    def signature(self, text):
+        return minhash_signature(text, self.shingle_size)
+
+    def find_near_duplicate(self, signature):
+        """
+        Returns (cluster_key, similarity) of the most similar indexed item at or
+        above the threshold, or None.
+        """
+        if not signature:
+            return None
+        # One primary-key lookup per band
+        band_lookup = " UNION ".join(
+            "SELECT item_key FROM minhash_bands WHERE kind = ? AND band = ? AND bucket = ?" for _ in range(BANDS))
+        params = []
+        for band, bucket in _band_keys(signature):
+            params.extend((self.kind, band, bucket))
+        params.append(self.kind)
+        sql = f"""
+        SELECT i.signature, i.cluster_key
+        FROM ({band_lookup}) c JOIN minhash_items i ON i.item_key = c.item_key
+        WHERE i.kind = ?
+        """
+        best = None
+        try:
+            for stored, cluster_key in self.conn.execute(sql, params):
+                similarity = estimate_similarity(signature, array("I", stored))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (cluster_key, similarity)
+        except sqlite3.Error as e:
+            logging.error(f"Error querying near-duplicate index: {e}")
+        if best:
+            self.duplicates += 1
+        return best
+
+    def add(self, item_key, signature, cluster_key=None):
+        """Indexes an item; near-duplicates can share the cluster_key of their representative."""
+        if not signature:
+            return
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO minhash_items(kind, item_key, signature, cluster_key) VALUES(?,?,?,?)",
+                    (self.kind, item_key, array("I", signature).tobytes(), cluster_key or item_key))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO minhash_bands(kind, band, bucket, item_key) VALUES(?,?,?,?)",
+                    ((self.kind, band, bucket, item_key) for band, bucket in _band_keys(signature)))
+        except sqlite3.Error as e:
+            logging.error(f"Error adding to near-duplicate index: {e}")
+
+    def close_connection(self):
+        """Closes the database connection."""
+        if self.conn:
+            self.conn.close()
+            logging.info("Database connection closed.")
@@ -2,6 +2,10 @@
 
 import sqlite3
 import logging
+from .bulk import executemany_counted
+from .migrations import connect, migrate, NEWS_MIGRATIONS
+from .ranking import article_score, register_functions
+from metrics import timed
 
 class DatabaseNews:
     """Manages all database operations for news articles."""
@@ -15,51 +19,76 @@ class DatabaseNews:
     def _create_connection(self):
         """Creates and returns a database connection."""
        
-        conn = sqlite3.connect(self.db_path)
+        conn = connect(self.db_path)
+        register_functions(conn)
         return conn
 
     def _create_table(self):
-        """Creates the news_articles table if it doesn't exist."""
+        """Creates the news_articles table and brings the schema up to date."""
         try:
-            cursor = self.conn.cursor()
-            # Corrected SQL: Removed trailing comma and added UNIQUE constraint
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS news_articles(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                summary TEXT NOT NULL,
-                url TEXT NOT NULL UNIQUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            self.conn.commit()
+            migrate(self.conn, NEWS_MIGRATIONS)
         except sqlite3.Error as e:
-            logging.error(f"Error creating table: {e}")
+            logging.error(f"Error migrating database: {e}")
 
+    @timed("db.insert_article")
     def insert_article(self, article_data: dict):
         """
-        Inserts a new article into the database.
+        Inserts a new article into the database, with its ranking score.
         Ignores insertion if the URL already exists.
         Returns the ID of the new row, or None if ignored.
         """
         # The method now correctly uses `self.conn`
-        sql = ''' INSERT OR IGNORE INTO news_articles(title, content, summary, url)
-                  VALUES(?,?,?,?) '''
+        sql = ''' INSERT OR IGNORE INTO news_articles(title, content, summary, url, copies, score)
+                  VALUES(?,?,?,?,?,?) '''
         try:
             cursor = self.conn.cursor()
-            cursor.execute(sql, (
-                article_data['title'],
-                article_data['content'],
-                article_data['summary'],
-                article_data['url']
-            ))
+            cursor.execute(sql, self._article_row(article_data))
             self.conn.commit()
-            return cursor.lastrowid
+            return cursor.lastrowid if cursor.rowcount else None
         except sqlite3.Error as e:
             logging.error(f"Error inserting article: {e}")
             return None
 
+    def insert_articles(self, articles):
+        """
+        Inserts many articles in one transaction, ignoring URLs that already exist.
+        Accepts any iterable of article dicts and returns {'inserted': n, 'ignored': m}.
+        """
+        sql = ''' INSERT OR IGNORE INTO news_articles(title, content, summary, url, copies, score)
+                  VALUES(?,?,?,?,?,?) '''
+        rows = (self._article_row(a) for a in articles)
+        return executemany_counted(self.conn, sql, rows, "articles")
+
+    @staticmethod
+    def _article_row(a):
+        copies = a.get('copies', 1)
+        return (a['title'], a['content'], a['summary'], a['url'], copies, article_score(copies))
+
+    def add_copy(self, url):
+        """
+        Records that another outlet ran the article stored under `url` and
+        rescores it. Returns False if no such article is stored (yet).
+        """
+        sql = ''' UPDATE news_articles SET copies = copies + 1, score = article_score(copies + 1, created_at)
+                  WHERE url = ? '''
+        try:
+            cursor = self.conn.execute(sql, (url,))
+            self.conn.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logging.error(f"Error updating article copies: {e}")
+            return False
+
+    def fetch_top_articles(self, limit=5):
+        """The `limit` highest-scoring articles (outlets carrying the story, with time decay), read off idx_news_articles_score."""
+        try:
+            cursor = self.conn.execute(
+                "SELECT title, summary, url FROM news_articles ORDER BY score DESC LIMIT ?", (limit,))
+            return [{'title': title, 'summary': summary, 'url': url} for title, summary, url in cursor]
+        except sqlite3.Error as e:
+            logging.error(f"Error fetching top articles: {e}")
+            return []
+
     def close_connection(self):
         """Closes the database connection."""
         if self.conn:
@@ -0,0 +1,60 @@
+"""
+Engagement ranking for source selection.
+
+Every tweet and article stores a precomputed "hot" score,
+
+    score = log1p(engagement) + epoch_seconds / TAU
+
+so newer items outrank older ones unless the older item has e times the
+engagement per TAU seconds of age. The score depends only on the item
+itself, never on the current time, so it is computed once on insert (and
+when an article gains another outlet's copy) and an index on score DESC
+serves "top K right now" as a range scan instead of a sort.
+"""
+import math
+import time
+from datetime import datetime, timezone
+
+# An item TAU seconds newer is worth e times the engagement (12 hours)
+TAU = 12 * 3600
+
+# Engagement weights: a reply costs more effort than a like; views are cheap
+REPLY_WEIGHT = 2.0
+VIEW_WEIGHT = 0.01
+
+
+def tweet_engagement(likes, replies, views):
+    return (likes or 0) + REPLY_WEIGHT * (replies or 0) + VIEW_WEIGHT * (views or 0)
+
+
+def hot_score(engagement, epoch):
+    return math.log1p(max(engagement or 0, 0)) + (epoch or 0) / TAU
+
+
+def to_epoch(timestamp, default=None):
+    """Epoch seconds from an ISO 8601 / SQLite timestamp string; `default` (or now) if it can't be parsed."""
+    if timestamp:
+        try:
+            parsed = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                # SQLite's CURRENT_TIMESTAMP is UTC without an offset
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+        except ValueError:
+            pass
+    return default if default is not None else time.time()
+
+
+def tweet_score(likes, replies, views, created_at=None):
+    return hot_score(tweet_engagement(likes, replies, views), to_epoch(created_at))
+
+
+def article_score(copies, created_at=None):
+    """Articles have no engagement counts; the number of outlets that ran the story stands in."""
+    return hot_score(max((copies or 1) - 1, 0), to_epoch(created_at))
+
+
+def register_functions(conn):
+    """Makes tweet_score()/article_score() callable from SQL, e.g. for migration backfills."""
+    conn.create_function("tweet_score", 4, tweet_score, deterministic=True)
+    conn.create_function("article_score", 2, article_score, deterministic=True)
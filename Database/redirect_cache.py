@@ -0,0 +1,109 @@
+import sqlite3
+import logging
+import time
+from .migrations import connect
+
+class RedirectCache:
+    """
+    Persistent cache of Google News feed links and the publisher URLs they
+    resolve to. Failed resolutions are cached too (final_url NULL) with a
+    shorter TTL, so a link that keeps failing is not retried on every run.
+    """
+
+    def __init__(self, db_path='database/redirect_cache.db', ttl=7 * 24 * 3600,
+                 negative_ttl=6 * 3600, max_entries=20000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.conn = self._create_connection()
+        self._create_table()
+
+    def _create_connection(self):
+        """Creates and returns a database connection."""
+        conn = connect(self.db_path)
+        return conn
+
+    def _create_table(self):
+        """Creates the redirect_cache table if it doesn't exist."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS redirect_cache(
+                feed_url TEXT PRIMARY KEY,
+                final_url TEXT,
+                resolved_at INTEGER NOT NULL,
+                last_used_at INTEGER NOT NULL
+            )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_redirect_cache_last_used ON redirect_cache(last_used_at)")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error creating table: {e}")
+
+    def get(self, feed_url):
+        """
+        Looks up a feed link. Returns (hit, final_url): on a negative hit the
+        final_url is None and the caller should skip the link.
+        """
+        now = int(time.time())
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT final_url, resolved_at FROM redirect_cache WHERE feed_url = ?", (feed_url,))
+            row = cursor.fetchone()
+            if row:
+                final_url, resolved_at = row
+                ttl = self.ttl if final_url else self.negative_ttl
+                if now - resolved_at < ttl:
+                    cursor.execute("UPDATE redirect_cache SET last_used_at = ? WHERE feed_url = ?", (now, feed_url))
+                    self.conn.commit()
+                    self.hits += 1
+                    return True, final_url
+        except sqlite3.Error as e:
+            logging.error(f"Error reading redirect cache: {e}")
+        self.misses += 1
+        return False, None
+
+    def put(self, feed_url, final_url):
+        """Stores a resolution; pass final_url=None to cache a failure."""
+        now = int(time.time())
+        sql = ''' INSERT OR REPLACE INTO redirect_cache(feed_url, final_url, resolved_at, last_used_at)
+                  VALUES(?,?,?,?) '''
+        try:
+            self.conn.execute(sql, (feed_url, final_url, now, now))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error writing redirect cache: {e}")
+
+    def evict(self):
+        """Drops expired entries, then the least recently used ones above max_entries."""
+        now = int(time.time())
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+            DELETE FROM redirect_cache
+            WHERE (final_url IS NOT NULL AND resolved_at < ?)
+               OR (final_url IS NULL AND resolved_at < ?)
+            """, (now - self.ttl, now - self.negative_ttl))
+            expired = cursor.rowcount
+            cursor.execute("""
+            DELETE FROM redirect_cache WHERE feed_url IN (
+                SELECT feed_url FROM redirect_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+            )
+            """, (self.max_entries,))
+            self.conn.commit()
+            return expired + cursor.rowcount
+        except sqlite3.Error as e:
+            logging.error(f"Error evicting redirect cache: {e}")
+            return 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close_connection(self):
+        """Closes the database connection."""
+        if self.conn:
+            self.conn.close()
+            logging.info("Database connection closed.")
@@ -0,0 +1,67 @@
+import sqlite3
+import logging
+from .migrations import connect
+
+class RunMetrics:
+    """
+    Per-run timings and counters from metrics.py. Each row is one
+    span (call count, total and max seconds) or one counter (value) of one
+    run, so slow runs can be compared stage by stage.
+    """
+
+    def __init__(self, db_path='database/metrics.db'):
+        self.db_path = db_path
+        self.conn = self._create_connection()
+        self._create_table()
+
+    def _create_connection(self):
+        """Creates and returns a database connection."""
+        conn = connect(self.db_path)
+        return conn
+
+    def _create_table(self):
+        """Creates the run_metrics table if it doesn't exist."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS run_metrics(
+                run_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                count INTEGER,
+                total_seconds REAL,
+                max_seconds REAL,
+                value REAL,
+                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (run_id, name)
+            )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_run_metrics_name ON run_metrics(name, recorded_at)")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error creating table: {e}")
+
+    def record(self, run_id, spans, counters):
+        """Stores one run: `spans` maps name -> (count, total, max), `counters` maps name -> value."""
+        sql = ''' INSERT OR REPLACE INTO run_metrics(run_id, name, kind, count, total_seconds, max_seconds, value)
+                  VALUES(?,?,?,?,?,?,?) '''
+        rows = [(run_id, name, 'span', n, total, peak, None) for name, (n, total, peak) in spans.items()]
+        rows += [(run_id, name, 'counter', None, None, None, value) for name, value in counters.items()]
+        try:
+            with self.conn:
+                self.conn.executemany(sql, rows)
+        except sqlite3.Error as e:
+            logging.error(f"Error recording run metrics: {e}")
+
+    def get_run(self, run_id):
+        """Returns [(name, kind, count, total_seconds, max_seconds, value)] for one run, slowest first."""
+        cursor = self.conn.execute(
+            """SELECT name, kind, count, total_seconds, max_seconds, value FROM run_metrics
+               WHERE run_id = ? ORDER BY total_seconds DESC, name""", (run_id,))
+        return cursor.fetchall()
+
+    def close_connection(self):
+        """Closes the database connection."""
+        if self.conn:
+            self.conn.close()
+            logging.info("Database connection closed.")
@@ -0,0 +1,110 @@
+import sqlite3
+import logging
+import math
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from .migrations import connect, migrate, NEWS_MIGRATIONS
+
+# Query parameters that never change which article a URL points to.
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'ocid', 'cmpid', 'ref', 'oc')
+
+
+def canonicalize_url(url):
+    """Normalizes a URL so the same article maps to one key (host case, tracking params, fragment)."""
+    if not url:
+        return url
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings, using double hashing of one blake2b digest."""
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenEntries:
+    """
+    Index of feed entries that were already ingested, keyed by RSS guid, feed
+    link and canonical article URL. Lookups go through an in-memory Bloom
+    filter loaded at startup; only "maybe seen" answers touch SQLite.
+    """
+
+    def __init__(self, db_path='database/news.db'):
+        self.db_path = db_path
+        self.conn = self._create_connection()
+        self._create_table()
+        self.bloom = self._load_bloom()
+
+    def _create_connection(self):
+        """Creates and returns a database connection."""
+        conn = connect(self.db_path)
+        return conn
+
+    def _create_table(self):
+        """Brings news.db up to date; the migration creates and seeds seen_entries."""
+        try:
+            migrate(self.conn, NEWS_MIGRATIONS)
+        except sqlite3.Error as e:
+            logging.error(f"Error migrating database: {e}")
+
+    def _load_bloom(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM seen_entries").fetchone()[0]
+        bloom = BloomFilter(capacity=max(count * 2, 10000))
+        for (key,) in self.conn.execute("SELECT key FROM seen_entries"):
+            bloom.add(key)
+        return bloom
+
+    @staticmethod
+    def _key(kind, value):
+        if kind == 'url':
+            value = canonicalize_url(value)
+        return f"{kind}:{value}"
+
+    def contains(self, kind, value):
+        """True if this guid/link/url was recorded before."""
+        if not value:
+            return False
+        key = self._key(kind, value)
+        if key not in self.bloom:
+            return False
+        row = self.conn.execute("SELECT 1 FROM seen_entries WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def add(self, guid=None, link=None, url=None):
+        """Records every known identifier of an ingested entry."""
+        keys = [self._key(kind, value) for kind, value in (('guid', guid), ('link', link), ('url', url)) if value]
+        try:
+            self.conn.executemany("INSERT OR IGNORE INTO seen_entries(key) VALUES(?)", ((k,) for k in keys))
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Error recording seen entry: {e}")
+            return
+        for key in keys:
+            self.bloom.add(key)
+
+    def close_connection(self):
+        """Closes the database connection."""
+        if self.conn:
+            self.conn.close()
+            logging.info("Database connection closed.")
@@ -1,5 +1,10 @@
 import sqlite3
 import logging
+import time
+from .bulk import executemany_counted
+from .migrations import connect, migrate, TWEETS_MIGRATIONS
+from .ranking import tweet_score
+from metrics import timed
 
 class DatabaseTweets:
     """Manages all database operations for Twitter trends and tweets."""
@@ -12,87 +17,181 @@ class DatabaseTweets:
     def _create_connection(self):
         """Creates and returns a database connection."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = connect(self.db_path)
             return conn
         except sqlite3.Error as e:
             logging.error(f"Error connecting to database: {e}")
             return None
 
     def _create_tables(self):
-        """Creates the required tables if they don't exist."""
+        """Creates the required tables and brings the schema up to date."""
         if not self.conn:
             return
         try:
-            cursor = self.conn.cursor()
-            # Table for trending topics
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS trending_topics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                topic TEXT NOT NULL UNIQUE,
-                tweet_volume INTEGER,
-                collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            # Table for individual tweets
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tweets (
-                id TEXT PRIMARY KEY,
-                text TEXT NOT NULL,
-                author TEXT,
-                url TEXT NOT NULL UNIQUE,
-                reply_count INTEGER,
-                like_count INTEGER,
-                collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            # Table for our generated content
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS generated_posts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                platform TEXT NOT NULL,
-                content TEXT NOT NULL,
-                source_type TEXT,
-                source_url TEXT,
-                generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            self.conn.commit()
+            migrate(self.conn, TWEETS_MIGRATIONS)
         except sqlite3.Error as e:
-            logging.error(f"Error creating tables: {e}")
+            logging.error(f"Error migrating database: {e}")
 
+    @timed("db.insert_trend")
     def insert_trend(self, trend_data: dict):
-        """Inserts a new trending topic, ignoring if it already exists."""
+        """
+        Inserts a new trending topic, ignoring if it already exists, and
+        appends this sighting to the topic's time series.
+        """
         sql = ''' INSERT OR IGNORE INTO trending_topics(topic, tweet_volume)
                   VALUES(?,?) '''
         try:
             cursor = self.conn.cursor()
             cursor.execute(sql, (trend_data['topic'], trend_data['tweet_volume']))
             self.conn.commit()
-            return cursor.lastrowid
+            trend_id = cursor.lastrowid if cursor.rowcount else None
+            self.insert_trend_observations([trend_data])
+            return trend_id
         except sqlite3.Error as e:
             logging.error(f"Error inserting trend: {e}")
             return None
 
+    @timed("db.insert_trends")
+    def insert_trends(self, trends):
+        """
+        Inserts many trending topics in one transaction and appends every one
+        to the trend time series. `trends` is streamed once. Returns
+        {'inserted': n, 'ignored': m} for the trending_topics table.
+        """
+        sql = ''' INSERT OR IGNORE INTO trending_topics(topic, tweet_volume)
+                  VALUES(?,?) '''
+        counts = {'inserted': 0, 'ignored': 0}
+        now = int(time.time())
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                for trend in trends:
+                    cursor.execute(sql, (trend['topic'], trend['tweet_volume']))
+                    counts['inserted' if cursor.rowcount else 'ignored'] += 1
+                    self._observe(cursor, trend, now)
+        except sqlite3.Error as e:
+            logging.error(f"Error inserting trends: {e}")
+            return {'inserted': 0, 'ignored': 0}
+        return counts
+
+    # --- Trend time series ---
+    def insert_trend_observations(self, trends, observed_at=None):
+        """
+        Appends one observation per trend ({'topic', 'tweet_volume'}, optionally
+        'observed_at' in epoch seconds, default now) in one transaction, streaming
+        `trends` once. Topic names are interned into `topics`; the hourly/daily
+        rollups are updated by a trigger.
+        """
+        now = int(observed_at or time.time())
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                for trend in trends:
+                    self._observe(cursor, trend, now)
+        except sqlite3.Error as e:
+            logging.error(f"Error inserting trend observations: {e}")
+
+    @staticmethod
+    def _observe(cursor, trend, now):
+        cursor.execute("INSERT OR IGNORE INTO topics(name) VALUES(?)", (trend['topic'],))
+        cursor.execute(
+            '''INSERT OR IGNORE INTO trend_observations(topic_id, observed_at, tweet_volume)
+               VALUES((SELECT id FROM topics WHERE name = ?), ?, ?)''',
+            (trend['topic'], int(trend.get('observed_at') or now), trend['tweet_volume']))
+
+    def fastest_rising_topics(self, hours=6, limit=10, now=None):
+        """
+        Topics whose average tweet_volume rose most over the last `hours`
+        compared with the `hours` before (topics new in the window rise from
+        0). Reads only the hourly rollups.
+        """
+        now = int(now or time.time())
+        current = now // 3600 * 3600
+        mid = current - (hours - 1) * 3600
+        start = mid - hours * 3600
+        sql = """
+        SELECT name, recent, previous, recent - COALESCE(previous, 0) AS rise FROM (
+            SELECT h.topic_id,
+                   1.0 * SUM(CASE WHEN h.bucket >= :mid THEN h.volume_sum END)
+                       / SUM(CASE WHEN h.bucket >= :mid THEN h.samples END) AS recent,
+                   1.0 * SUM(CASE WHEN h.bucket < :mid THEN h.volume_sum END)
+                       / SUM(CASE WHEN h.bucket < :mid THEN h.samples END) AS previous
+            FROM trend_hourly h
+            WHERE h.bucket >= :start
+            GROUP BY h.topic_id
+        ) r JOIN topics t ON t.id = r.topic_id
+        WHERE recent IS NOT NULL
+        ORDER BY rise DESC
+        LIMIT :limit
+        """
+        try:
+            cursor = self.conn.execute(sql, {'mid': mid, 'start': start, 'limit': limit})
+            return [{'topic': name, 'recent_volume': recent, 'previous_volume': previous, 'rise': rise}
+                    for name, recent, previous, rise in cursor]
+        except sqlite3.Error as e:
+            logging.error(f"Error reading rising topics: {e}")
+            return []
+
+    def downsample_trends(self, raw_days=7, hourly_days=90, now=None):
+        """
+        Drops raw observations older than `raw_days` and hourly rollups older
+        than `hourly_days`; the coarser rollups keep their history. Returns the
+        number of rows removed.
+        """
+        now = int(now or time.time())
+        try:
+            with self.conn:
+                # Seek per topic through the (topic_id, observed_at) key instead of scanning
+                raw = self.conn.execute(
+                    "DELETE FROM trend_observations WHERE topic_id IN (SELECT id FROM topics) AND observed_at < ?",
+                    (now - raw_days * 86400,)).rowcount
+                hourly = self.conn.execute("DELETE FROM trend_hourly WHERE bucket < ?",
+                                           (now - hourly_days * 86400,)).rowcount
+            return raw + hourly
+        except sqlite3.Error as e:
+            logging.error(f"Error downsampling trends: {e}")
+            return 0
+
+    @staticmethod
+    def _tweet_row(t):
+        return (t['id'], t['text'], t['author'], t['url'], t['replyCount'], t['likeCount'],
+                t.get('viewCount'), t.get('createdAt'),
+                tweet_score(t['likeCount'], t['replyCount'], t.get('viewCount'), t.get('createdAt')))
+
+    @timed("db.insert_tweet")
     def insert_tweet(self, tweet_data: dict):
-        """Inserts a new tweet, ignoring if its URL already exists."""
-        sql = ''' INSERT OR IGNORE INTO tweets(id, text, author, url, reply_count, like_count)
-                  VALUES(?,?,?,?,?,?) '''
+        """Inserts a new tweet with its ranking score, ignoring if its URL already exists."""
+        sql = ''' INSERT OR IGNORE INTO tweets(id, text, author, url, reply_count, like_count, view_count, created_at, score)
+                  VALUES(?,?,?,?,?,?,?,?,?) '''
         try:
             cursor = self.conn.cursor()
-            cursor.execute(sql, (
-                tweet_data['id'],
-                tweet_data['text'],
-                tweet_data['author'],
-                tweet_data['url'],
-                tweet_data['replyCount'],
-                tweet_data['likeCount']
-            ))
+            cursor.execute(sql, self._tweet_row(tweet_data))
             self.conn.commit()
-            return cursor.lastrowid
+            return cursor.lastrowid if cursor.rowcount else None
         except sqlite3.Error as e:
             logging.error(f"Error inserting tweet: {e}")
             return None
-            
+
+    def insert_tweets(self, tweets):
+        """
+        Inserts many tweets in one transaction, ignoring URLs that already exist.
+        Streams from any iterable of tweet dicts; returns {'inserted': n, 'ignored': m}.
+        """
+        sql = ''' INSERT OR IGNORE INTO tweets(id, text, author, url, reply_count, like_count, view_count, created_at, score)
+                  VALUES(?,?,?,?,?,?,?,?,?) '''
+        rows = (self._tweet_row(t) for t in tweets)
+        return executemany_counted(self.conn, sql, rows, "tweets")
+
+    def fetch_top_tweets(self, limit=5):
+        """The `limit` highest-scoring tweets (engagement with time decay), read off idx_tweets_score."""
+        try:
+            cursor = self.conn.execute("SELECT text, url FROM tweets ORDER BY score DESC LIMIT ?", (limit,))
+            return [{'text': text, 'url': url} for text, url in cursor]
+        except sqlite3.Error as e:
+            logging.error(f"Error fetching top tweets: {e}")
+            return []
+
+    @timed("db.insert_generated_post")
     def insert_generated_post(self, post_data: dict):
         """Inserts a generated social media post into the database."""
         sql = ''' INSERT INTO generated_posts(platform, content, source_type, source_url)
@@ -111,6 +210,111 @@ class DatabaseTweets:
             logging.error(f"Error inserting generated post: {e}")
             return None
 
+    def insert_generated_posts(self, posts):
+        """Inserts many generated posts in one transaction. Returns {'inserted': n, 'ignored': m}."""
+        sql = ''' INSERT INTO generated_posts(platform, content, source_type, source_url)
+                  VALUES(?,?,?,?) '''
+        rows = ((p['platform'], p['content'], p['source_type'], p['source_url']) for p in posts)
+        return executemany_counted(self.conn, sql, rows, "generated posts")
+
+    def get_watermarks(self, search_terms):
+        """Returns {search_term: (last_tweet_id, last_created_at)} for the terms that have one."""
+        terms = list(search_terms)
+        if not terms:
+            return {}
+        placeholders = ",".join("?" * len(terms))
+        try:
+            cursor = self.conn.execute(
+                f"SELECT search_term, last_tweet_id, last_created_at FROM topic_watermarks WHERE search_term IN ({placeholders})",
+                terms)
+            return {term: (tweet_id, created_at) for term, tweet_id, created_at in cursor}
+        except sqlite3.Error as e:
+            logging.error(f"Error reading watermarks: {e}")
+            return {}
+
+    def update_watermarks(self, watermarks: dict):
+        """
+        Advances per-term watermarks from {search_term: (tweet_id, created_at)}.
+        A watermark never moves backwards.
+        """
+        sql = """
+        INSERT INTO topic_watermarks(search_term, last_tweet_id, last_created_at)
+        VALUES(?,?,?)
+        ON CONFLICT(search_term) DO UPDATE SET
+            last_created_at = CASE WHEN excluded.last_tweet_id > last_tweet_id
+                                   THEN excluded.last_created_at ELSE last_created_at END,
+            last_tweet_id = MAX(last_tweet_id, excluded.last_tweet_id),
+            updated_at = CURRENT_TIMESTAMP
+        """
+        rows = ((term, tweet_id, created_at) for term, (tweet_id, created_at) in watermarks.items())
+        return executemany_counted(self.conn, sql, rows, "watermarks")
+
+    def claim_post(self, platform: str, worker_id: str, lease_seconds: int = 300):
+        """
+        Atomically claims the oldest pending post for a platform (or one whose
+        lease expired) for `worker_id`. Returns (id, content) or None when the
+        queue is empty. Safe with several publishers on the same database.
+        """
+        now = int(time.time())
+        sql = """
+        UPDATE generated_posts
+        SET status = 'claimed', claimed_by = ?, lease_expires_at = ?, attempts = attempts + 1
+        WHERE id = (
+            SELECT id FROM generated_posts
+            WHERE platform = ?
+              AND status IN ('pending', 'claimed')  -- matches idx_generated_posts_open
+              AND (status = 'pending' OR lease_expires_at < ?)
+            ORDER BY generated_at, id
+            LIMIT 1
+        )
+        RETURNING id, content
+        """
+        try:
+            cursor = self.conn.execute(sql, (worker_id, now + lease_seconds, platform, now))
+            row = cursor.fetchone()
+            self.conn.commit()
+            return row
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logging.error(f"Error claiming post: {e}")
+            return None
+
+    def ack_post(self, post_id: int, worker_id: str, remote_id: str = None):
+        """Marks a claimed post as published. Returns False if the claim was lost to another worker."""
+        sql = """
+        UPDATE generated_posts
+        SET status = 'published', published_at = CURRENT_TIMESTAMP, remote_id = ?, lease_expires_at = NULL
+        WHERE id = ? AND claimed_by = ? AND status = 'claimed'
+        """
+        return self._release(sql, (remote_id, post_id, worker_id), "acknowledging")
+
+    def requeue_post(self, post_id: int, worker_id: str):
+        """Returns a claimed post to the queue so it is retried."""
+        sql = """
+        UPDATE generated_posts
+        SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL
+        WHERE id = ? AND claimed_by = ? AND status = 'claimed'
+        """
+        return self._release(sql, (post_id, worker_id), "requeueing")
+
+    def fail_post(self, post_id: int, worker_id: str):
+        """Marks a claimed post as permanently failed (e.g. rejected by the platform)."""
+        sql = """
+        UPDATE generated_posts
+        SET status = 'failed', lease_expires_at = NULL
+        WHERE id = ? AND claimed_by = ? AND status = 'claimed'
+        """
+        return self._release(sql, (post_id, worker_id), "failing")
+
+    def _release(self, sql, params, action):
+        try:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            logging.error(f"Error {action} post: {e}")
+            return False
+
     def close_connection(self):
         """Closes the database connection."""
         if self.conn:
@@ -1,58 +1,78 @@
 import os
-import sqlite3
 import random
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import google.generativeai as genai
-from dotenv import load_dotenv
 import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not __package__:  # run as a script rather than through `python -m Pipeline`
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Database.news_db import DatabaseNews
 from Database.tweets_db import DatabaseTweets # Use the corrected DB class
+from Database.llm_cache import get_llm_cache
+from Generator.rate_limiter import QuotaLimiter, RateLimitedModel
+from Pipeline.config import configure_gemini
+from metrics import METRICS, timed, export_run
 
 # --- 1. SETUP ---
-load_dotenv()
-try:
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY not found. Please set it in your .env file.")
-    genai.configure(api_key=GEMINI_API_KEY)
-except Exception as e:
-    print(f"Error configuring Gemini API: {e}")
-    exit()
-
-# --- 2. DATABASE OPERATIONS ---
-def fetch_latest_articles(db_path='database/news.db', limit=5):
-    """Fetches the most recent articles from the news database."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT title, summary, url FROM news_articles ORDER BY created_at DESC LIMIT ?", (limit,))
-    articles = cursor.fetchall()
-    conn.close()
-    return [{'title': r[0], 'summary': r[1], 'url': r[2]} for r in articles]
-
-def fetch_top_tweets(db_path='database/tweets.db', limit=5):
-    """Fetches the most popular tweets from the tweets database."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT text, url FROM tweets ORDER BY like_count DESC, collected_at DESC LIMIT ?", (limit,))
-    tweets = cursor.fetchall()
-    conn.close()
-    return [{'text': r[0], 'url': r[1]} for r in tweets]
-
-# --- 3. CONTENT GENERATION WITH GEMINI ---
-def generate_post_with_gemini(source_material: dict, platform: str):
+# Generation fans out over a thread pool; every worker shares one model client and
+# one limiter sized to the Gemini quota (override with GEMINI_RPM / GEMINI_TPM).
+GENERATION_WORKERS = 8
+GEMINI_LIMITER = QuotaLimiter(
+    rpm=int(os.getenv("GEMINI_RPM", "15")),
+    tpm=int(os.getenv("GEMINI_TPM", "1000000")),
+)
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Returns the shared, rate-limited Gemini model, creating it on first use."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            configure_gemini()
+            _model = RateLimitedModel(genai.GenerativeModel('gemini-1.5-flash-latest'), GEMINI_LIMITER)
+    return _model
+
+# --- 2. CONTENT GENERATION WITH GEMINI ---
+# Define different content styles/formats
+POST_FORMATS = [
+    "Opinion: Share a unique perspective on this.",
+    "Analysis: Break down why this is significant.",
+    "News Breakdown: Summarize this into key takeaways for a busy audience.",
+    "Thought Leadership: Offer a deep, authoritative insight based on this.",
+    "Short Tips: Provide quick, actionable advice related to this topic."
+]
+TWITTER_MAX_CHARS = 280
+# Extra single-platform attempts for a variant that fails validation
+MAX_VARIANT_RETRIES = 2
+
+def _choose_format(source_material, platform, randomize=False):
+    if randomize:
+        return random.choice(POST_FORMATS)
+    digest = hashlib.sha256(f"{platform}:{source_material}".encode('utf-8')).digest()
+    return POST_FORMATS[digest[0] % len(POST_FORMATS)]
+
+def is_valid_post(platform: str, text) -> bool:
+    """Local checks a post must pass before it is queued."""
+    if not isinstance(text, str) or not text.strip():
+        return False
+    if platform == "Twitter":
+        return len(text.strip()) <= TWITTER_MAX_CHARS
+    return True
+
+@timed("generator.generate_post_with_gemini")
+def generate_post_with_gemini(source_material: dict, platform: str, randomize: bool = False, attempt: int = 0):
     """
     Generates a social media post using Gemini based on source material.
+    By default the post format is picked deterministically from the source, so
+    reruns are served from the LLM cache. With randomize=True the format is
+    drawn at random and the cache is bypassed. `attempt` > 0 marks a retry
+    after a draft failed validation and asks for a stricter length.
     """
-    model = genai.GenerativeModel('gemini-1.5-flash-latest')
-
-    # Define different content styles/formats
-    post_formats = [
-        "Opinion: Share a unique perspective on this.",
-        "Analysis: Break down why this is significant.",
-        "News Breakdown: Summarize this into key takeaways for a busy audience.",
-        "Thought Leadership: Offer a deep, authoritative insight based on this.",
-        "Short Tips: Provide quick, actionable advice related to this topic."
-    ]
-    chosen_format = random.choice(post_formats)
+    model = get_model()
+    chosen_format = _choose_format(source_material, platform, randomize)
 
     # Tailor prompts for each platform
     if platform == "LinkedIn":
@@ -89,80 +109,141 @@ def generate_post_with_gemini(source_material: dict, platform: str):
 
         Generate the Tweet now.
         """
+        if attempt:
+            prompt += f"""
+        A previous draft was too long. Attempt {attempt + 1}: the tweet, hashtags included, must be at most {TWITTER_MAX_CHARS - 30} characters.
+        """
     else:
         return None
 
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        text = get_llm_cache().generate(model, prompt, use_cache=not randomize)
+        return text.strip()
     except Exception as e:
         print(f"Error generating content with Gemini: {e}")
         return None
 
-# --- 4. MAIN ORCHESTRATION ---
-def main():
-    print("🚀 Starting Viral Content Generator...")
-    db_tweets = DatabaseTweets() # For writing generated posts
+@timed("generator.generate_posts_for_platforms")
+def generate_posts_for_platforms(source_material, platforms=("LinkedIn", "Twitter")):
+    """
+    Generates every platform variant for one source in a single Gemini call,
+    as a JSON object keyed by platform. Each variant is validated locally and
+    only the ones that fail are regenerated with single-platform calls.
+    Returns a dict of platform -> post (variants that never validate are left out).
+    """
+    instructions = {
+        "LinkedIn": "Professional, insightful and conversational; encourages discussion; 3-4 professional hashtags.",
+        "Twitter": f"Clear, punchy and shareable; at most {TWITTER_MAX_CHARS} characters including 2-3 hashtags.",
+    }
+    variants = "\n".join(
+        f'        - "{p}": {instructions[p]} Adopt the style of: "{_choose_format(source_material, p)}".'
+        for p in platforms
+    )
+    prompt = f"""
+        You are a social media strategist who writes for several platforms at once.
+        Write one post per platform below, based on the provided material.
+
+        **Platforms:**
+{variants}
+
+        **Rules:** Do NOT include the source URL. Respond with a single JSON object whose keys are
+        the platform names above and whose values are the finished posts as strings.
+
+        **Source Material:**
+        `{source_material}`
+        """
 
-    # --- Generate posts from News Articles ---
+    posts = {}
+    try:
+        text = get_llm_cache().generate(get_model(), prompt, params={"response_mime_type": "application/json"})
+        parsed = json.loads(text)
+        if isinstance(parsed, dict):
+            posts = {p: parsed[p].strip() for p in platforms if is_valid_post(p, parsed.get(p))}
+    except Exception as e:
+        print(f"Multi-platform generation failed, falling back to per-platform calls: {e}")
+
+    for platform in platforms:
+        if platform in posts:
+            continue
+        for attempt in range(MAX_VARIANT_RETRIES):
+            post = generate_post_with_gemini(source_material, platform, attempt=attempt)
+            if is_valid_post(platform, post):
+                posts[platform] = post
+                break
+    return posts
+
+# --- 3. MAIN ORCHESTRATION ---
+PLATFORMS = ("LinkedIn", "Twitter")
+
+def _generate_job(source_text, source_type, source_url):
+    """Worker task: every platform variant for one source, ready for insert_generated_posts."""
+    posts = generate_posts_for_platforms(source_text, PLATFORMS)
+    return [{
+        'platform': platform,
+        'content': content,
+        'source_type': source_type,
+        'source_url': source_url
+    } for platform, content in posts.items()]
+
+def _completed_jobs(futures):
+    """Yields each job's posts as its worker finishes; a failed job is logged and skipped."""
+    for future in as_completed(futures):
+        _, source_type, source_url = futures[future]
+        try:
+            posts = future.result()
+        except Exception as e:
+            print(f"     ❌ Generation failed for {source_type}: {source_url}: {e}")
+            continue
+        for post in posts:
+            print(f"     ✅ {post['platform']} post generated for {post['source_type']}: {post['source_url']}")
+        yield posts
+
+def main(articles_limit=5, tweets_limit=5, db_tweets=None, db_news=None):
+    """
+    Generates posts for the top-ranked sources (see Database/ranking.py). Pass
+    `db_tweets` / `db_news` to reuse open connections (they are left open).
+    """
+    print("🚀 Starting Viral Content Generator...")
+    try:
+        get_model()
+    except ValueError as e:
+        print(f"Error configuring Gemini API: {e}")
+        return
+    owns_db = db_tweets is None
+    db_tweets = db_tweets or DatabaseTweets() # For writing generated posts
+    owns_news_db = db_news is None
+    db_news = db_news or DatabaseNews()
+
+    jobs = []
     print("\n📰 Processing news articles...")
-    articles = fetch_latest_articles(limit=5)
-    for article in articles:
-        # Generate one LinkedIn post per article
-        print(f"  -> Generating LinkedIn post for article: {article['title'][:30]}...")
-        linkedin_post = generate_post_with_gemini(article['summary'], "LinkedIn")
-        if linkedin_post:
-            db_tweets.insert_generated_post({
-                'platform': 'LinkedIn',
-                'content': linkedin_post,
-                'source_type': 'news_article',
-                'source_url': article['url']
-            })
-            print("     ✅ LinkedIn Post Generated and Saved.")
-
-        # Generate one Twitter post per article
-        print(f"  -> Generating Twitter post for article: {article['title'][:30]}...")
-        twitter_post = generate_post_with_gemini(article['summary'], "Twitter")
-        if twitter_post:
-            db_tweets.insert_generated_post({
-                'platform': 'Twitter',
-                'content': twitter_post,
-                'source_type': 'news_article',
-                'source_url': article['url']
-            })
-            print("     ✅ Twitter Post Generated and Saved.")
-
-    # --- Generate posts from Trending Tweets ---
+    for article in db_news.fetch_top_articles(limit=articles_limit):
+        print(f"  -> Queueing LinkedIn and Twitter posts for article: {article['title'][:30]}...")
+        jobs.append((article['summary'], 'news_article', article['url']))
+
     print("\n🐦 Processing trending tweets...")
-    tweets = fetch_top_tweets(limit=5)
-    for tweet in tweets:
+    for tweet in db_tweets.fetch_top_tweets(limit=tweets_limit):
         # It's often better to generate commentary rather than just reposting
         # For simplicity, we'll use the tweet text as inspiration
-        print(f"  -> Generating LinkedIn post based on tweet: {tweet['text'][:40]}...")
-        linkedin_post = generate_post_with_gemini(tweet['text'], "LinkedIn")
-        if linkedin_post:
-            db_tweets.insert_generated_post({
-                'platform': 'LinkedIn',
-                'content': linkedin_post,
-                'source_type': 'tweet',
-                'source_url': tweet['url']
-            })
-            print("     ✅ LinkedIn Post Generated and Saved.")
-        
-        print(f"  -> Generating Twitter post based on tweet: {tweet['text'][:40]}...")
-        twitter_post = generate_post_with_gemini(tweet['text'], "Twitter")
-        if twitter_post:
-            db_tweets.insert_generated_post({
-                'platform': 'Twitter',
-                'content': twitter_post,
-                'source_type': 'tweet',
-                'source_url': tweet['url']
-            })
-            print("     ✅ Twitter Post Generated and Saved.")
-
-
-    db_tweets.close_connection()
-    print("\n🎉 Content generation complete. Posts are saved in 'database/tweets.db' in the 'generated_posts' table.")
+        print(f"  -> Queueing LinkedIn and Twitter posts based on tweet: {tweet['text'][:40]}...")
+        jobs.append((tweet['text'], 'tweet', tweet['url']))
+
+    counts = {'inserted': 0, 'ignored': 0}
+    with ThreadPoolExecutor(max_workers=GENERATION_WORKERS) as pool:
+        futures = {pool.submit(_generate_job, *job): job for job in jobs}
+        # Only this thread touches the database. Each job is committed on its own,
+        # so publishers can claim posts while the rest are still being generated.
+        for posts in _completed_jobs(futures):
+            result = db_tweets.insert_generated_posts(posts)
+            counts['inserted'] += result['inserted']
+            counts['ignored'] += result['ignored']
+
+    if owns_db:
+        db_tweets.close_connection()
+    if owns_news_db:
+        db_news.close_connection()
+    print(f"\n🎉 Content generation complete. {counts['inserted']} of {len(jobs) * len(PLATFORMS)} posts saved in 'database/tweets.db' in the 'generated_posts' table.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    export_run()
+    print(f"Timings:\n{METRICS.summary()}")
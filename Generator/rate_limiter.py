@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import deque
+from tokens import estimate_tokens
+
+
+class QuotaLimiter:
+    """
+    Thread-safe sliding-window limiter for requests per minute and tokens per
+    minute. Every worker that calls Gemini shares one instance, so the pool as
+    a whole stays inside the API quota no matter how many threads are running.
+    """
+
+    def __init__(self, rpm=15, tpm=1_000_000, window=60.0, clock=time.monotonic, sleep=time.sleep):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self.clock = clock
+        self.sleep = sleep
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._events and now - self._events[0][0] >= self.window:
+            _, tokens = self._events.popleft()
+            self._tokens -= tokens
+
+    def acquire(self, tokens=1):
+        """Blocks until one request of `tokens` tokens fits in the window, then records it."""
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._prune(now)
+                if len(self._events) < self.rpm and self._tokens + tokens <= self.tpm:
+                    self._events.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                wait = self.window - (now - self._events[0][0])
+            self.sleep(max(wait, 0.01))
+
+
+class RateLimitedModel:
+    """
+    Wraps a GenerativeModel so every generate_content call first takes its
+    share of the shared quota. Cache hits never reach the model, so they
+    cost no quota.
+    """
+
+    def __init__(self, model, limiter):
+        self.model = model
+        self.limiter = limiter
+        self.model_name = getattr(model, 'model_name', str(model))
+
+    def generate_content(self, prompt, **kwargs):
+        self.limiter.acquire(estimate_tokens(prompt))
+        return self.model.generate_content(prompt, **kwargs)
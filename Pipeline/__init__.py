@@ -0,0 +1,8 @@
+"""
+Single-process entry point for the whole agent:
+
+    python -m Pipeline run --stages news,tweets,generate,publish
+
+Stage modules (and their heavy dependencies) are imported only when their
+stage runs; see Pipeline/runner.py.
+"""
@@ -0,0 +1,25 @@
+import argparse
+import sys
+from Pipeline.runner import STAGES, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m Pipeline", description="Runs the AI content agent.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run pipeline stages in one process")
+    run_parser.add_argument("--stages", default=",".join(STAGES),
+                            help=f"comma-separated stages to run in order (default: {','.join(STAGES)})")
+    run_parser.add_argument("--dry-run", action="store_true", help="scrape tweets from a local fake Apify and publish to a local fake X client")
+    run_parser.add_argument("--metrics-textfile", metavar="PATH",
+                            help="also write the run's metrics in Prometheus textfile format (or set METRICS_TEXTFILE)")
+    args = parser.parse_args(argv)
+
+    stages = [name.strip() for name in args.stages.split(",") if name.strip()]
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    run(stages, dry_run=args.dry_run, metrics_textfile=args.metrics_textfile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Environment and API configuration. Nothing here runs at import time: stages
+call these when they start, so importing a stage module never exits the
+process or fails because an unrelated stage's key is missing.
+"""
+import os
+import threading
+from dotenv import load_dotenv
+
+_gemini_configured = False
+_gemini_lock = threading.Lock()
+
+
+def require_env(name):
+    """Returns an environment variable (loading .env first) or raises ValueError if it is unset."""
+    load_dotenv()
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"{name} not found. Please set it in your .env file.")
+    return value
+
+
+def configure_gemini():
+    """Configures google.generativeai once per process."""
+    global _gemini_configured
+    with _gemini_lock:
+        if not _gemini_configured:
+            import google.generativeai as genai
+            genai.configure(api_key=require_env("GEMINI_API_KEY"))
+            _gemini_configured = True
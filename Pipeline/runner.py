@@ -0,0 +1,87 @@
+import importlib
+import time
+from Database.news_db import DatabaseNews
+from Database.tweets_db import DatabaseTweets
+from metrics import METRICS, export_run
+
+# Stage name -> module holding its main(). Modules are imported when the stage
+# runs, so e.g. a publish-only run never loads playwright, newspaper or apify.
+STAGES = {
+    'news': 'Collectors.news_collector',
+    'tweets': 'Collectors.twitter_collector',
+    'generate': 'Generator.content_generator',
+    'publish': 'Publisher.post_x',
+}
+
+
+class Context:
+    """Resources shared by every stage of one run, opened on first use."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self._news_db = None
+        self._tweets_db = None
+
+    @property
+    def news_db(self):
+        if self._news_db is None:
+            self._news_db = DatabaseNews()
+        return self._news_db
+
+    @property
+    def tweets_db(self):
+        if self._tweets_db is None:
+            self._tweets_db = DatabaseTweets()
+        return self._tweets_db
+
+    def close(self):
+        for db in (self._news_db, self._tweets_db):
+            if db is not None:
+                db.close_connection()
+        from Database import llm_cache
+        if llm_cache._default_cache is not None:
+            llm_cache._default_cache.close_connection()
+
+
+def _run_stage(name, module, ctx):
+    if name == 'news':
+        return module.main(db=ctx.news_db)
+    if name == 'tweets':
+        return module.main(dry_run=ctx.dry_run, db=None if ctx.dry_run else ctx.tweets_db)
+    if name == 'generate':
+        return module.main(db_tweets=ctx.tweets_db, db_news=ctx.news_db)
+    if name == 'publish':
+        return module.main(dry_run=ctx.dry_run, db=None if ctx.dry_run else ctx.tweets_db)
+    raise ValueError(f"Unknown stage: {name}")
+
+
+def run(stages, dry_run=False, log=print, metrics_textfile=None):
+    """
+    Runs the named stages in order in this process and returns a timing
+    report: {stage: {'import': s, 'run': s}}. Import time covers loading the
+    stage module and its dependencies not already loaded by earlier stages.
+    The run's spans and counters are saved with export_run() at the end.
+    """
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)}. Choose from {', '.join(STAGES)}.")
+
+    ctx = Context(dry_run=dry_run)
+    report = {}
+    try:
+        for name in stages:
+            start = time.perf_counter()
+            module = importlib.import_module(STAGES[name])
+            imported = time.perf_counter()
+            METRICS.observe(f"stage.{name}.import", imported - start)
+            log(f"▶ Stage '{name}' (imported in {imported - start:.2f}s)")
+            with METRICS.span(f"stage.{name}"):
+                _run_stage(name, module, ctx)
+            report[name] = {'import': round(imported - start, 3), 'run': round(time.perf_counter() - imported, 3)}
+    finally:
+        ctx.close()
+        for name, timing in report.items():
+            log(f"  {name:<9} import {timing['import']:.2f}s  run {timing['run']:.2f}s")
+        run_id = export_run(textfile=metrics_textfile)
+        log(f"Metrics for run {run_id}:\n{METRICS.summary()}")
+    return report
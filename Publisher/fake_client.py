@@ -0,0 +1,75 @@
+import json
+import random
+import requests
+import tweepy
+
+
+class VirtualClock:
+    """A clock whose sleep() just advances time, so rate-limit waits cost nothing offline."""
+
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+def _response(status, headers, body):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers)
+    response._content = json.dumps(body).encode('utf-8')
+    response.url = "https://api.x.com/2/tweets"
+    return response
+
+
+class FakeXClient:
+    """
+    Local stand-in for tweepy.Client(return_type=requests.Response). It enforces
+    a fixed-window quota like POST /2/tweets, returns the same rate-limit
+    headers, answers 429 once the window is spent and can inject 503s and
+    latency, so the publish scheduler can be exercised without credentials.
+    With `unauthorized=True` every post is refused with a 401, as with bad
+    or expired credentials.
+    """
+
+    def __init__(self, limit=100, window=900, latency=0.05, error_rate=0.0, clock=None, seed=None,
+                 unauthorized=False):
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.error_rate = error_rate
+        self.clock = clock or VirtualClock()
+        self.random = random.Random(seed)
+        self.window_start = self.clock.time()
+        self.used = 0
+        self.posted = []
+        self.unauthorized = unauthorized
+
+    def _headers(self):
+        return {
+            "x-rate-limit-limit": str(self.limit),
+            "x-rate-limit-remaining": str(max(0, self.limit - self.used)),
+            "x-rate-limit-reset": str(int(self.window_start + self.window)),
+        }
+
+    def create_tweet(self, text=None, **kwargs):
+        self.clock.sleep(self.latency)
+        now = self.clock.time()
+        if now >= self.window_start + self.window:
+            self.window_start, self.used = now, 0
+
+        if self.unauthorized:
+            raise tweepy.errors.Unauthorized(_response(401, {}, {"title": "Unauthorized", "detail": "Unauthorized"}))
+        if self.used >= self.limit:
+            raise tweepy.errors.TooManyRequests(_response(429, self._headers(), {"title": "Too Many Requests"}))
+        if self.random.random() < self.error_rate:
+            raise tweepy.errors.TwitterServerError(_response(503, {}, {"title": "Service Unavailable"}))
+
+        self.used += 1
+        tweet_id = str(1_000_000 + len(self.posted))
+        self.posted.append(text)
+        return _response(201, self._headers(), {"data": {"id": tweet_id, "text": text}})
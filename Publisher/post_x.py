@@ -1,29 +1,66 @@
 import os
-import sqlite3
+import socket
 import tweepy
-import time # Import the time module
+import requests
 from dotenv import load_dotenv
+import sys
+if not __package__:  # run as a script rather than through `python -m Pipeline`
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Database.tweets_db import DatabaseTweets
+from Publisher.scheduler import PublishScheduler
+from metrics import METRICS, export_run
 
-def get_post_from_db(db_path='database/tweets.db'):
-    """Fetches one unpublished Twitter post from the database and deletes it."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT id, content FROM generated_posts WHERE platform = 'Twitter' ORDER BY generated_at ASC LIMIT 1"
-    )
-    post = cursor.fetchone()
-    
-    if post:
-        post_id, post_content = post
-        cursor.execute("DELETE FROM generated_posts WHERE id = ?", (post_id,))
-        conn.commit()
+# How long a claimed post stays reserved for this worker before others may retry it
+LEASE_SECONDS = 300
 
-    conn.close()
-    return post_content if post else None
+def _dry_run_queue(posts):
+    db = DatabaseTweets(db_path=':memory:')
+    db.insert_generated_posts({
+        'platform': 'Twitter',
+        'content': f"Dry-run post #{i}",
+        'source_type': 'dry_run',
+        'source_url': None
+    } for i in range(posts))
+    return db
+
+def run_dry(tweets_to_post=10, limit=5, window=900, error_rate=0.1):
+    """
+    Exercises the scheduler offline: a throwaway in-memory queue, the local
+    FakeXClient and a virtual clock, so rate-limit waits take no real time.
+    A second pass uses a client that answers 401, which must leave the whole
+    queue pending. Returns the first pass's scheduler stats (posts per
+    virtual minute, waits, retries).
+    """
+    from Publisher.fake_client import FakeXClient, VirtualClock
+
+    clock = VirtualClock()
+    client = FakeXClient(limit=limit, window=window, error_rate=error_rate, clock=clock, seed=42)
+    db = _dry_run_queue(tweets_to_post)
+    scheduler = PublishScheduler(client, db, "dry-run", clock=clock.time, sleep=clock.sleep)
+    stats = scheduler.run(max_posts=tweets_to_post)
+    db.close_connection()
+    print(f"Dry run: {stats}")
+
+    client = FakeXClient(unauthorized=True, clock=clock, seed=42)
+    db = _dry_run_queue(tweets_to_post)
+    scheduler = PublishScheduler(client, db, "dry-run", clock=clock.time, sleep=clock.sleep)
+    unauthorized = scheduler.run(max_posts=tweets_to_post)
+    pending = db.conn.execute("SELECT COUNT(*) FROM generated_posts WHERE status = 'pending'").fetchone()[0]
+    db.close_connection()
+    print(f"Dry run with a 401 client: {unauthorized} ({pending} of {tweets_to_post} posts still pending)")
+    return stats
+
+def main(tweets_to_post=10, worker_id=None, dry_run=False, db=None):
+    """
+    Authenticates with the X API and drains up to `tweets_to_post` posts from
+    the generated_posts queue. Pacing follows the X rate-limit headers instead
+    of a fixed sleep; see Publisher/scheduler.py. With dry_run=True nothing is
+    sent and a local fake client is used instead. Pass `db` to reuse an open
+    DatabaseTweets (it is left open).
+    """
+    if dry_run:
+        return run_dry(tweets_to_post)
 
-def main(tweets_to_post=10):
-    """Authenticates with the X API and posts multiple tweets in a loop."""
     # --- 1. Load Credentials & Authenticate Once ---
     load_dotenv()
     api_key = os.getenv("X_API_KEY")
@@ -41,40 +78,27 @@ def main(tweets_to_post=10):
             consumer_key=api_key,
             consumer_secret=api_secret,
             access_token=access_token,
-            access_token_secret=access_token_secret
+            access_token_secret=access_token_secret,
+            return_type=requests.Response  # keeps the rate-limit headers
         )
     except Exception as e:
         print(f"❌ Authentication failed: {e}")
         return
 
-    # --- 2. Loop to Fetch and Post Tweets ---
-    for i in range(tweets_to_post):
-        print(f"\n--- Attempting to post tweet {i + 1}/{tweets_to_post} ---")
-        
-        tweet_text = get_post_from_db()
-
-        if not tweet_text:
-            print("✅ No more posts for Twitter in the queue. All done!")
-            break # Exit the loop if the database is empty
-
-        try:
-            print(f"🚀 Posting tweet:\n---\n{tweet_text}\n---")
-            response = client.create_tweet(text=tweet_text)
-            print(f"✅ Successfully posted! Tweet ID: {response.data['id']}")
-            
-            # Wait for 15 seconds before posting the next tweet
-            if i < tweets_to_post - 1:
-                 print("...waiting 15 seconds before next post...")
-                 time.sleep(15)
-
-        except tweepy.errors.TweepyException as e:
-            print(f"❌ An error occurred with the X API: {e}")
-            break # Stop if there's an API error
-        except Exception as e:
-            print(f"❌ An unexpected error occurred: {e}")
-            break
+    # --- 2. Drain the Queue as Fast as the Quota Allows ---
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    owns_db = db is None
+    db = db or DatabaseTweets()
+    scheduler = PublishScheduler(client, db, worker_id, lease_seconds=LEASE_SECONDS)
+    stats = scheduler.run(max_posts=tweets_to_post)
+    print(f"Publishing finished: {stats}")
+    if owns_db:
+        db.close_connection()
+    return stats
 
 
 if __name__ == "__main__":
     # Call the main function to start the process
-    main()
\ No newline at end of file
+    main(dry_run="--dry-run" in sys.argv)
+    export_run()
+    print(f"Timings:\n{METRICS.summary()}")
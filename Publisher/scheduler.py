@@ -0,0 +1,196 @@
+import random
+import time
+import requests
+import tweepy
+from metrics import span, count
+
+
+class RateLimitBucket:
+    """
+    Token bucket driven by the X API's own rate-limit headers. Each response
+    refills it from `x-rate-limit-*` (15-minute endpoint window) and
+    `x-user-limit-24hour-*` (daily post cap); the tighter of the two wins.
+    Until the API has told us anything, posting is allowed.
+    """
+
+    HEADER_FAMILIES = ("x-rate-limit", "x-user-limit-24hour")
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.remaining = None
+        self.reset_at = 0.0
+
+    def update(self, headers):
+        """Refills the bucket from a response's headers. Returns True if any limit header was present."""
+        if not headers:
+            return False
+        found = False
+        remaining, reset_at = None, 0.0
+        for family in self.HEADER_FAMILIES:
+            try:
+                family_remaining = int(headers[f"{family}-remaining"])
+                family_reset = float(headers[f"{family}-reset"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            found = True
+            if remaining is None or family_remaining < remaining:
+                remaining, reset_at = family_remaining, family_reset
+            elif family_remaining == 0:
+                reset_at = max(reset_at, family_reset)
+        if found:
+            self.remaining, self.reset_at = remaining, reset_at
+        return found
+
+    def exhaust(self, reset_at=None):
+        """Empties the bucket, e.g. after a 429; refills at `reset_at` (epoch seconds)."""
+        self.remaining = 0
+        self.reset_at = reset_at if reset_at else self.clock() + 60
+
+    def consume(self):
+        if self.remaining is not None and self.remaining > 0:
+            self.remaining -= 1
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is available now)."""
+        if self.remaining is None or self.remaining > 0:
+            return 0.0
+        wait = self.reset_at - self.clock()
+        if wait <= 0:
+            # Window has reset; the next response will tell us the new quota
+            self.remaining = None
+            return 0.0
+        return wait
+
+
+def is_duplicate_content(error):
+    """X answers a repeated post with 403 "...duplicate content"; that one is about the post, not the app."""
+    messages = getattr(error, 'api_messages', None) or [str(error)]
+    return any('duplicate' in str(message).lower() for message in messages)
+
+
+class PublishScheduler:
+    """
+    Drains the generated_posts queue as fast as the X quota allows. Posts are
+    sent back to back while the bucket has tokens; when it is empty (or the
+    API answers 429) the scheduler sleeps until the reported reset time,
+    unless that is more than `max_wait` seconds away (e.g. the daily post cap
+    is spent): then it stops and leaves the remaining posts queued for a
+    later run.
+    Transient failures (5xx, network errors) are retried with exponential
+    backoff and full jitter; permanent ones (4xx) mark the post failed. A
+    401/403 that is not about duplicate content means the credentials or app
+    permissions are wrong, so the post is requeued and the run stops.
+    """
+
+    def __init__(self, client, db, worker_id, platform='Twitter', lease_seconds=300,
+                 max_consecutive_failures=5, base_backoff=2.0, max_backoff=300.0, max_wait=900.0,
+                 clock=time.time, sleep=time.sleep, log=print):
+        self.client = client
+        self.db = db
+        self.worker_id = worker_id
+        self.platform = platform
+        self.lease_seconds = lease_seconds
+        self.max_consecutive_failures = max_consecutive_failures
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+        self.log = log
+        self.bucket = RateLimitBucket(clock=clock)
+        self.stats = {'published': 0, 'requeued': 0, 'failed': 0, 'throttled': 0, 'waited_seconds': 0.0,
+                      'deferred_until': None}
+
+    def _wait(self, seconds, reason):
+        if seconds <= 0:
+            return
+        self.log(f"...waiting {seconds:.1f}s ({reason})...")
+        self.stats['waited_seconds'] += seconds
+        self.sleep(seconds)
+
+    def _backoff(self, failures):
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** (failures - 1)))
+
+    def _publish(self, text):
+        """Posts one tweet and returns its id, refilling the bucket from the response headers."""
+        with span("x.create_tweet"):
+            response = self.client.create_tweet(text=text)
+        if isinstance(response, requests.Response):
+            self.bucket.update(response.headers)
+            return str(response.json()['data']['id'])
+        # tweepy's default Response namedtuple carries no headers
+        self.bucket.consume()
+        return str(response.data['id'])
+
+    def run(self, max_posts=None):
+        """Publishes until the queue is empty, `max_posts` is reached or failures persist."""
+        start = self.clock()
+        failures = 0
+        while max_posts is None or self.stats['published'] < max_posts:
+            wait = self.bucket.wait_time()
+            if wait > self.max_wait:
+                # Nothing is claimed at this point, so the queue is left as it is
+                self.stats['deferred_until'] = self.bucket.reset_at
+                count("x.deferred")
+                self.log(f"⏸️ X quota resets in {wait / 3600:.1f}h; leaving the rest of the queue for a later run.")
+                break
+            self._wait(wait, "rate limit window")
+
+            post = self.db.claim_post(self.platform, self.worker_id, lease_seconds=self.lease_seconds)
+            if not post:
+                self.log("✅ No more posts for Twitter in the queue. All done!")
+                break
+            post_id, text = post
+
+            try:
+                tweet_id = self._publish(text)
+            except tweepy.errors.TooManyRequests as e:
+                self.db.requeue_post(post_id, self.worker_id)
+                self.stats['throttled'] += 1
+                count("x.throttled")
+                failures += 1
+                if failures >= self.max_consecutive_failures:
+                    self.log(f"❌ Giving up after {failures} consecutive rate-limit errors.")
+                    break
+                headers = e.response.headers if e.response is not None else {}
+                if not self.bucket.update(headers) or self.bucket.remaining:
+                    reset = headers.get("x-rate-limit-reset")
+                    self.bucket.exhaust(float(reset) if reset else None)
+                self.log("⏳ Rate limited by the X API, waiting for the window to reset.")
+                continue
+            except (tweepy.errors.TwitterServerError, requests.exceptions.RequestException) as e:
+                self.db.requeue_post(post_id, self.worker_id)
+                self.stats['requeued'] += 1
+                failures += 1
+                if failures >= self.max_consecutive_failures:
+                    self.log(f"❌ Giving up after {failures} consecutive transient errors: {e}")
+                    break
+                self._wait(self._backoff(failures), f"transient error: {e}")
+                continue
+            except tweepy.errors.TweepyException as e:
+                if isinstance(e, (tweepy.errors.Unauthorized, tweepy.errors.Forbidden)) and not is_duplicate_content(e):
+                    # Every later post would be refused too; keep them all for the next run
+                    self.db.requeue_post(post_id, self.worker_id)
+                    self.stats['requeued'] += 1
+                    count("x.unauthorized")
+                    self.log(f"❌ X API refused the credentials, stopping with post {post_id} requeued: {e}")
+                    break
+                # Other 4xx: duplicate content, too long... retrying this post won't help
+                self.db.fail_post(post_id, self.worker_id)
+                self.stats['failed'] += 1
+                failures += 1
+                self.log(f"❌ X API rejected post {post_id}: {e}")
+                if failures >= self.max_consecutive_failures:
+                    self.log(f"❌ Giving up after {failures} consecutive failed posts.")
+                    break
+                continue
+
+            failures = 0
+            self.db.ack_post(post_id, self.worker_id, remote_id=tweet_id)
+            self.stats['published'] += 1
+            count("x.published")
+            self.log(f"✅ Successfully posted! Tweet ID: {tweet_id}")
+
+        elapsed = self.clock() - start
+        self.stats['posts_per_minute'] = round(self.stats['published'] / elapsed * 60, 2) if elapsed > 0 else None
+        return self.stats
@@ -0,0 +1,196 @@
+"""
+Lightweight timing and counter API for the hot paths.
+
+    from metrics import timed, span, count
+
+    @timed("newspaper.extract")
+    def get_article_content_from_url(url): ...
+
+    with span("apify.call"):
+        run = await actor.call(...)
+
+    async for item in timed_aiter("apify.iterate_items", dataset.iterate_items()): ...
+
+    count("llm_cache.hit")
+
+Spans keep only a count, a running total and a maximum per name (about a
+microsecond and one lock per call), so they can stay on in production.
+A span whose body raises also bumps the `<name>.errors` counter. At the end
+of a run, export_run() stores everything in the run_metrics table and can
+write a Prometheus textfile for node_exporter's textfile collector.
+"""
+import functools
+import inspect
+import os
+import threading
+import time
+import uuid
+
+
+class Metrics:
+    """Process-wide span and counter registry. Safe to use from threads and coroutines."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.spans = {}     # name -> [count, total_seconds, max_seconds]
+        self.counters = {}  # name -> value
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def span(self, name):
+        """Context manager timing its body as one call of `name`."""
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator recording every call of a function (sync or async) as a span."""
+        clock = self.clock
+
+        def decorate(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = clock()
+                    try:
+                        return await func(*args, **kwargs)
+                    except BaseException:
+                        self.count(f"{name}.errors")
+                        raise
+                    finally:
+                        self.observe(name, clock() - start)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = clock()
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    self.count(f"{name}.errors")
+                    raise
+                finally:
+                    self.observe(name, clock() - start)
+            return wrapper
+        return decorate
+
+    async def timed_aiter(self, name, iterable):
+        """
+        Re-yields an async iterator's items, recording the time spent waiting
+        for them (not the consumer's work between items) as one span.
+        """
+        iterator = iterable.__aiter__()
+        waited = 0.0
+        try:
+            while True:
+                start = self.clock()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                except BaseException:
+                    self.count(f"{name}.errors")
+                    raise
+                finally:
+                    waited += self.clock() - start
+                yield item
+        finally:
+            self.observe(name, waited)
+
+    def snapshot(self):
+        """Returns ({name: (count, total, max)}, {name: value}) at this moment."""
+        with self._lock:
+            return {k: tuple(v) for k, v in self.spans.items()}, dict(self.counters)
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def summary(self):
+        """One line per span, slowest total first, for printing at the end of a run."""
+        spans, counters = self.snapshot()
+        lines = [f"  {name:<36} {n:>6} calls  {total:>8.2f}s total  {peak:>7.3f}s max"
+                 for name, (n, total, peak) in sorted(spans.items(), key=lambda kv: -kv[1][1])]
+        lines += [f"  {name:<36} {value:>6}" for name, value in sorted(counters.items())]
+        return "\n".join(lines)
+
+    def to_prometheus(self):
+        spans, counters = self.snapshot()
+        lines = [
+            "# HELP agent_span_seconds Time spent in instrumented calls.",
+            "# TYPE agent_span_seconds summary",
+        ]
+        for name, (n, total, _) in sorted(spans.items()):
+            lines.append(f'agent_span_seconds_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f'agent_span_seconds_count{{span="{name}"}} {n}')
+        lines += ["# HELP agent_span_max_seconds Slowest single instrumented call.",
+                  "# TYPE agent_span_max_seconds gauge"]
+        for name, (_, _, peak) in sorted(spans.items()):
+            lines.append(f'agent_span_max_seconds{{span="{name}"}} {peak:.6f}')
+        lines += ["# HELP agent_events_total Counted pipeline events.", "# TYPE agent_events_total counter"]
+        for name, value in sorted(counters.items()):
+            lines.append(f'agent_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Writes the textfile atomically, so the collector never reads a half-written file."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = self.metrics.clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.metrics.count(f"{self.name}.errors")
+        self.metrics.observe(self.name, self.metrics.clock() - self.start)
+        return False
+
+
+METRICS = Metrics()
+timed = METRICS.timed
+span = METRICS.span
+count = METRICS.count
+timed_aiter = METRICS.timed_aiter
+
+
+def export_run(run_id=None, db_path='database/metrics.db', textfile=None):
+    """
+    Persists this process's spans and counters under `run_id` (generated if not
+    given) and, if `textfile` or METRICS_TEXTFILE is set, writes a Prometheus
+    textfile too. Returns the run id.
+    """
+    from Database.run_metrics import RunMetrics
+
+    run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    store = RunMetrics(db_path)
+    store.record(run_id, *METRICS.snapshot())
+    store.close_connection()
+    textfile = textfile or os.getenv("METRICS_TEXTFILE")
+    if textfile:
+        METRICS.write_prometheus(textfile)
+    return run_id
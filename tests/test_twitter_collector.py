@@ -0,0 +1,69 @@
+"""Concurrent per-topic scraping against the local Apify stand-in (Collectors/fake_apify.py)."""
+import asyncio
+from Collectors.fake_apify import FakeApifyClientAsync
+from Collectors.twitter_collector import APIFY_CONCURRENCY, TWEET_BUDGET, fetch_twitter_trends, split_budget
+
+TOPICS = [f"#Topic{k}" for k in range(8)]
+
+
+def collect_pairs(client, topics, **kwargs):
+    async def run():
+        return [pair async for pair in fetch_twitter_trends(topics, client=client, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_split_budget_is_even_and_exact():
+    assert split_budget(100, 5) == [20, 20, 20, 20, 20]
+    assert split_budget(100, 3) == [34, 33, 33]
+    assert split_budget(3, 5) == [1, 1, 1, 0, 0]
+    assert sum(split_budget(TWEET_BUDGET, 7)) == TWEET_BUDGET
+
+
+def test_runs_share_the_collection_budget():
+    client = FakeApifyClientAsync(tweets_per_topic=TWEET_BUDGET, respect_max_items=True)
+    pairs = collect_pairs(client, TOPICS, max_trend_items=3, max_tweet_items=TWEET_BUDGET)
+    assert sorted(run["maxItems"] for run in client.runs) == [33, 33, 34]
+    assert len(pairs) == TWEET_BUDGET
+
+
+def test_topics_with_no_budget_left_are_not_scraped():
+    client = FakeApifyClientAsync(respect_max_items=True)
+    collect_pairs(client, TOPICS, max_trend_items=5, max_tweet_items=3)
+    assert sorted(run["searchTerms"][0] for run in client.runs) == TOPICS[:3]
+
+
+def test_concurrency_cap_is_respected():
+    client = FakeApifyClientAsync(tweets_per_topic=2, latency=0.02)
+    collect_pairs(client, TOPICS, max_trend_items=len(TOPICS), max_tweet_items=100, concurrency=3)
+    assert len(client.runs) == len(TOPICS)
+    assert client.max_in_flight == 3
+
+
+def test_default_concurrency_is_apify_concurrency():
+    client = FakeApifyClientAsync(tweets_per_topic=2, latency=0.02)
+    collect_pairs(client, TOPICS, max_trend_items=len(TOPICS), max_tweet_items=100)
+    assert client.max_in_flight == APIFY_CONCURRENCY
+
+
+def test_items_merge_as_each_run_finishes():
+    slow, fast = TOPICS[0], TOPICS[1]
+    client = FakeApifyClientAsync(tweets_per_topic=3, topic_latency={slow: 0.2, fast: 0.0})
+    pairs = collect_pairs(client, [slow, fast], max_tweet_items=100)
+    assert [topic for topic, _ in pairs] == [fast] * 3 + [slow] * 3
+
+
+def test_failed_run_does_not_stop_the_others():
+    client = FakeApifyClientAsync(tweets_per_topic=4, failing_topics={TOPICS[1]})
+    pairs = collect_pairs(client, TOPICS[:3], max_tweet_items=100)
+    assert sorted({topic for topic, _ in pairs}) == [TOPICS[0], TOPICS[2]]
+    assert len(pairs) == 8
+
+
+def test_watermark_cuts_off_older_items():
+    client = FakeApifyClientAsync(tweets_per_topic=5)
+    first = collect_pairs(client, TOPICS[:1], max_tweet_items=100)
+    cutoff = max(int(item["id"]) for _, item in first)
+    client._next_id = cutoff - 2  # the next run repeats the two newest tweets
+    again = collect_pairs(client, TOPICS[:1], max_tweet_items=100, watermarks={TOPICS[0]: (cutoff, None)})
+    assert all(int(item["id"]) > cutoff for _, item in again)
+    assert len(again) == 3
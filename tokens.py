@@ -0,0 +1,12 @@
+"""
+Token estimate shared by prompt budgets (Collectors/compressor.py) and quota
+accounting (Generator/rate_limiter.py), so both count the same way.
+"""
+
+# Rough average for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count for quota purposes (~4 characters per token)."""
+    return max(1, len(text) // CHARS_PER_TOKEN)